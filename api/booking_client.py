@@ -1,35 +1,193 @@
 """
 API client for the Booking service.
 """
+import asyncio
+import json
+import threading
 import httpx
-from typing import List, Optional
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
 from config.settings import settings
-from models.dto import BookingBatchResponse
+from models.dto import BookingBatchResponse, BookingContact
 import logging
 
+# orjson parses response bodies several times faster than the stdlib
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
+
+# httpx only supports HTTP/2 when the optional h2 package is installed
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Connection pool limits for the shared HTTP client
+MAX_KEEPALIVE_CONNECTIONS = 20
+MAX_CONNECTIONS = 50
+KEEPALIVE_EXPIRY = 30.0  # seconds
+
+# Number of pages requested ahead of the consumer by prefetch_contacts()
+PREFETCH_READAHEAD = 2
+
+
+def _use_http2() -> bool:
+    """Return True if HTTP/2 is enabled in settings and supported by httpx."""
+    return settings.booking_service.http2 and HTTP2_AVAILABLE
+
+
+def _parse_bookings_count(response: httpx.Response, event_id: str) -> int:
+    """Extract the booking count from a /bookings/count response."""
+    response.raise_for_status()
+    
+    # The API returns: {"event_id": "...", "total_bookings": X}
+    data = _json_loads(response.content)
+    count = data.get('total_bookings', 0) if isinstance(data, dict) else 0
+    
+    logger.info("Retrieved booking count for event_id=%s: %d", event_id, count)
+    return count
+
+
+def _parse_bookings_batch(
+    response: httpx.Response,
+    event_id: str,
+    offset: int,
+    row_type=BookingBatchResponse
+) -> list:
+    """Convert a /bookings/batch response into row_type objects (BookingBatchResponse by default)."""
+    # Handle 404 as "no more results" rather than an error
+    if response.status_code == 404:
+        logger.info(
+            "No more bookings available for event_id=%s at offset=%d (404 response)",
+            event_id, offset
+        )
+        return []
+        
+    response.raise_for_status()
+    
+    data = _json_loads(response.content)
+    
+    # Handle empty response
+    if not data:
+        logger.info("Empty batch returned for event_id=%s, offset=%d", event_id, offset)
+        return []
+        
+    # Convert API response to row objects
+    bookings = list(map(row_type.from_dict, data))
+    
+    logger.info(
+        "Retrieved %d bookings for event_id=%s, offset=%d",
+        len(bookings), event_id, offset
+    )
+    return bookings
+
+
+async def _prefetch_pages(
+    fetch_page: Callable[[int], Awaitable[list]],
+    batch_size: int,
+    readahead: int
+) -> AsyncIterator[list]:
+    """
+    Yield pages from fetch_page(offset) in order, keeping `readahead` requests in flight.
+    
+    A short page does not end iteration, since the API may cap pages below
+    batch_size; paging resumes where it ended, stepping by its length.
+    
+    Args:
+        fetch_page: Coroutine function returning the page at an offset
+        batch_size: Number of rows requested per page
+        readahead: Number of pages to keep in flight
+        
+    Yields:
+        Non-empty pages, stopping at the first empty one
+    """
+    pending = deque()
+    next_offset = 0
+    step = batch_size
+    
+    def schedule_next():
+        nonlocal next_offset
+        pending.append((next_offset, asyncio.create_task(fetch_page(next_offset))))
+        next_offset += step
+        
+    async def cancel_pending():
+        for _, task in pending:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+        pending.clear()
+        
+    for _ in range(max(readahead, 1)):
+        schedule_next()
+        
+    try:
+        while pending:
+            offset, task = pending.popleft()
+            page = await task
+            if not page:
+                return
+                
+            if len(page) < step:
+                # Pages already requested assumed a longer page; re-request from here
+                await cancel_pending()
+                step = len(page)
+                next_offset = offset + step
+                for _ in range(max(readahead, 1)):
+                    schedule_next()
+            else:
+                # Request the next page before handing this one to the consumer
+                schedule_next()
+            yield page
+    finally:
+        await cancel_pending()
+
 
 class BookingAPIClient:
     """Client for interacting with the Booking service API."""
     
-    def __init__(self, base_url: Optional[str] = None, timeout: Optional[int] = None):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: Optional[int] = None,
+        max_inflight: Optional[int] = None
+    ):
         """
         Initialize the Booking API client.
         
         Args:
             base_url: Base URL for the booking service (defaults to settings)
             timeout: Request timeout in seconds (defaults to settings)
+            max_inflight: Maximum concurrent requests (defaults to settings)
         """
         self.base_url = base_url or settings.booking_service.base_url
         self.timeout = timeout or settings.booking_service.timeout
+        self.max_inflight = max_inflight or settings.booking_service.max_inflight
         
         # Remove trailing slash from base_url if present
         self.base_url = self.base_url.rstrip('/')
         
+        # Caps concurrent requests when the client is shared between threads
+        self._inflight = threading.BoundedSemaphore(self.max_inflight)
+        
+        # Persistent client so connections are kept alive between requests
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            http2=_use_http2(),
+            limits=httpx.Limits(
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=MAX_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            )
+        )
+        
         logger.info(
-            f"BookingAPIClient initialized with base_url={self.base_url}, "
-            f"timeout={self.timeout}s"
+            "BookingAPIClient initialized with base_url=%s, timeout=%ss, max_inflight=%d",
+            self.base_url, self.timeout, self.max_inflight
         )
     
     def get_bookings_count(self, event_id: str) -> int:
@@ -45,28 +203,20 @@ class BookingAPIClient:
         Raises:
             httpx.HTTPError: If the API request fails
         """
-        url = f"{self.base_url}/bookings/count"
         params = {"event_id": event_id}
         
         try:
-            logger.debug(f"Fetching booking count for event_id={event_id}")
+            logger.debug("Fetching booking count for event_id=%s", event_id)
+            
+            with self._inflight:
+                response = self._client.get("/bookings/count", params=params)
+            return _parse_bookings_count(response, event_id)
             
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.get(url, params=params)
-                response.raise_for_status()
-                
-                # The API returns: {"event_id": "...", "total_bookings": X}
-                data = response.json()
-                count = data.get('total_bookings', 0) if isinstance(data, dict) else 0
-                
-                logger.info(f"Retrieved booking count for event_id={event_id}: {count}")
-                return count
-                
         except httpx.HTTPError as e:
-            logger.error(f"HTTP error fetching booking count: {e}")
+            logger.error("HTTP error fetching booking count: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Unexpected error fetching booking count: {e}")
+            logger.error("Unexpected error fetching booking count: %s", e)
             raise
     
     def get_bookings_batch(
@@ -89,7 +239,6 @@ class BookingAPIClient:
         Raises:
             httpx.HTTPError: If the API request fails
         """
-        url = f"{self.base_url}/bookings/batch"
         params = {
             "event_id": event_id,
             "offset": offset,
@@ -97,46 +246,235 @@ class BookingAPIClient:
         }
         
         try:
-            logger.debug(
-                f"Fetching booking batch for event_id={event_id}, "
-                f"offset={offset}, batch_size={batch_size}"
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Fetching booking batch for event_id=%s, offset=%d, batch_size=%d",
+                    event_id, offset, batch_size
+                )
+            
+            with self._inflight:
+                response = self._client.get("/bookings/batch", params=params)
+            return _parse_bookings_batch(response, event_id, offset)
+            
+        except httpx.HTTPError as e:
+            logger.error("HTTP error fetching booking batch: %s", e)
+            raise
+        except Exception as e:
+            logger.error("Unexpected error fetching booking batch: %s", e)
+            raise
+    
+    def close(self):
+        """Close the underlying HTTP client and its pooled connections."""
+        self._client.close()
+        logger.debug("BookingAPIClient connections closed")
+    
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+
+class AsyncBookingAPIClient:
+    """Async client for the Booking service API with concurrent pagination."""
+    
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: Optional[int] = None,
+        max_inflight: Optional[int] = None
+    ):
+        """
+        Initialize the async Booking API client.
+        
+        Args:
+            base_url: Base URL for the booking service (defaults to settings)
+            timeout: Request timeout in seconds (defaults to settings)
+            max_inflight: Maximum concurrent requests (defaults to settings)
+        """
+        self.base_url = base_url or settings.booking_service.base_url
+        self.timeout = timeout or settings.booking_service.timeout
+        self.max_inflight = max_inflight or settings.booking_service.max_inflight
+        
+        # Remove trailing slash from base_url if present
+        self.base_url = self.base_url.rstrip('/')
+        
+        # Caps concurrent requests across all pagination helpers
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            http2=_use_http2(),
+            limits=httpx.Limits(
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=MAX_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
             )
+        )
+        
+        logger.info(
+            "AsyncBookingAPIClient initialized with base_url=%s, timeout=%ss, max_inflight=%d",
+            self.base_url, self.timeout, self.max_inflight
+        )
+    
+    async def get_bookings_count(self, event_id: str) -> int:
+        """
+        Get the count of bookings for a specific event.
+        
+        Args:
+            event_id: The event ID to count bookings for
             
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.get(url, params=params)
-                
-                # Handle 404 as "no more results" rather than an error
-                if response.status_code == 404:
-                    logger.info(
-                        f"No more bookings available for event_id={event_id} "
-                        f"at offset={offset} (404 response)"
-                    )
-                    return []
-                
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                # Handle empty response
-                if not data:
-                    logger.info(f"Empty batch returned for event_id={event_id}, offset={offset}")
-                    return []
-                
-                # Convert API response to BookingBatchResponse objects
-                bookings = [
-                    BookingBatchResponse.from_dict(booking)
-                    for booking in data
-                ]
-                
-                logger.info(
-                    f"Retrieved {len(bookings)} bookings for event_id={event_id}, "
-                    f"offset={offset}"
+        Returns:
+            Number of confirmed bookings
+            
+        Raises:
+            httpx.HTTPError: If the API request fails
+        """
+        params = {"event_id": event_id}
+        
+        try:
+            logger.debug("Fetching booking count for event_id=%s", event_id)
+            
+            async with self._inflight:
+                response = await self._client.get("/bookings/count", params=params)
+            return _parse_bookings_count(response, event_id)
+            
+        except httpx.HTTPError as e:
+            logger.error("HTTP error fetching booking count: %s", e)
+            raise
+        except Exception as e:
+            logger.error("Unexpected error fetching booking count: %s", e)
+            raise
+    
+    async def get_bookings_batch(
+        self,
+        event_id: str,
+        offset: int = 0,
+        batch_size: int = 5
+    ) -> List[BookingBatchResponse]:
+        """
+        Get a batch of bookings for a specific event.
+        
+        Args:
+            event_id: The event ID to fetch bookings for
+            offset: Number of records to skip (for pagination)
+            batch_size: Maximum number of records to return
+            
+        Returns:
+            List of BookingBatchResponse objects
+            
+        Raises:
+            httpx.HTTPError: If the API request fails
+        """
+        return await self._fetch_batch(event_id, offset, batch_size, BookingBatchResponse)
+    
+    async def get_booking_contacts(
+        self,
+        event_id: str,
+        offset: int = 0,
+        batch_size: int = 5
+    ) -> List[BookingContact]:
+        """
+        Get a batch of bookings reduced to the email and name needed for mailing.
+        Skips building full BookingBatchResponse objects for each row.
+        
+        Args:
+            event_id: The event ID to fetch bookings for
+            offset: Number of records to skip (for pagination)
+            batch_size: Maximum number of records to return
+            
+        Returns:
+            List of BookingContact tuples
+            
+        Raises:
+            httpx.HTTPError: If the API request fails
+        """
+        return await self._fetch_batch(event_id, offset, batch_size, BookingContact)
+    
+    async def _fetch_batch(self, event_id: str, offset: int, batch_size: int, row_type) -> list:
+        """Request one /bookings/batch page and parse its rows as row_type."""
+        params = {
+            "event_id": event_id,
+            "offset": offset,
+            "batch_size": batch_size
+        }
+        
+        try:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Fetching booking batch for event_id=%s, offset=%d, batch_size=%d",
+                    event_id, offset, batch_size
                 )
-                return bookings
-                
+            
+            async with self._inflight:
+                response = await self._client.get("/bookings/batch", params=params)
+            return _parse_bookings_batch(response, event_id, offset, row_type)
+            
         except httpx.HTTPError as e:
-            logger.error(f"HTTP error fetching booking batch: {e}")
+            logger.error("HTTP error fetching booking batch: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Unexpected error fetching booking batch: {e}")
+            logger.error("Unexpected error fetching booking batch: %s", e)
             raise
+    
+    def prefetch_contacts(
+        self,
+        event_id: str,
+        batch_size: int = 100,
+        readahead: int = PREFETCH_READAHEAD
+    ) -> AsyncIterator[List[BookingContact]]:
+        """
+        Yield contact pages in order while the next pages download in the background.
+        
+        Keeps up to `readahead` page requests in flight so network time overlaps
+        with whatever the consumer does with the current page. Iteration stops
+        at the first empty page.
+        
+        Args:
+            event_id: The event ID to fetch bookings for
+            batch_size: Number of bookings per page
+            readahead: Number of pages to keep in flight
+            
+        Yields:
+            Non-empty lists of BookingContact tuples
+        """
+        return _prefetch_pages(
+            lambda offset: self.get_booking_contacts(event_id, offset, batch_size),
+            batch_size,
+            readahead
+        )
+    
+    async def close(self):
+        """Close the underlying HTTP client and its pooled connections."""
+        await self._client.aclose()
+        logger.debug("AsyncBookingAPIClient connections closed")
+    
+    async def __aenter__(self):
+        """Async context manager entry."""
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.close()
+
+
+# Shared client instance, created lazily by get_booking_client()
+_booking_client: Optional[BookingAPIClient] = None
+
+
+def get_booking_client() -> BookingAPIClient:
+    """
+    Get the process-wide BookingAPIClient.
+    
+    Reusing one client keeps its connection pool warm across requests.
+    
+    Returns:
+        Shared BookingAPIClient instance
+    """
+    global _booking_client
+    if _booking_client is None:
+        _booking_client = BookingAPIClient()
+    return _booking_client
@@ -1,11 +1,17 @@
 """
 FastAPI server for notification service REST API.
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import logging
 
-from api.routes import router
+from api.routes import router, start_notification_workers, stop_notification_workers
+from config.settings import settings
+from email_service.email_service import close_sendgrid_client
+from processor.notification_processor import close_notification_processor
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +24,8 @@ def create_app() -> FastAPI:
         description="REST API for manually triggering event notifications",
         version="1.0.0",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        default_response_class=ORJSONResponse
     )
     
     # Add CORS middleware
@@ -35,11 +42,22 @@ def create_app() -> FastAPI:
     
     @app.on_event("startup")
     async def startup_event():
+        # Set on the running loop, since uvicorn creates its own
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(
+                max_workers=settings.api.thread_pool_size,
+                thread_name_prefix="notif"
+            )
+        )
+        start_notification_workers(app)
         logger.info("Notification Service API started")
     
     @app.on_event("shutdown")
     async def shutdown_event():
         logger.info("Notification Service API shutting down")
+        await stop_notification_workers(app)
+        await close_notification_processor()
+        await close_sendgrid_client()
     
     return app
 
@@ -51,4 +69,4 @@ app = create_app()
 if __name__ == "__main__":
     import uvicorn
     import os
-    uvicorn.run("api.server:app", host="0.0.0.0", port=int(os.getenv("PORT", 8000)))
+    uvicorn.run("api.main:app", host="0.0.0.0", port=int(os.getenv("PORT", 8000)))
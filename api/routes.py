@@ -1,21 +1,36 @@
 """
 API routes for manual notification triggers.
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from pydantic import BaseModel
+import asyncio
+import json
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 import logging
 
-from processor.notification_processor import NotificationProcessor
+from processor.notification_processor import get_notification_processor
 from models.dto import Event, NotificationMessage
+from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Health payload never changes, so it is serialized once at import time
+_HEALTH_BYTES = json.dumps({
+    "status": "healthy",
+    "service": "notification-service",
+    "version": "1.0.0"
+}).encode()
+
+# On shutdown, how long queued and running notifications get to finish
+SHUTDOWN_DRAIN_TIMEOUT = 30  # seconds
+
 
 class EventData(BaseModel):
     """Event data model."""
+    model_config = ConfigDict(frozen=True)
+    
     event_id: str
     event_name: str
     description: Optional[str] = None
@@ -29,6 +44,8 @@ class EventData(BaseModel):
 
 class SendNotificationRequest(BaseModel):
     """Request model for sending notifications."""
+    model_config = ConfigDict(frozen=True)
+    
     type: str  # event_created, event_updated, event_update, event_cancelled, event_reminder
     event: EventData
 
@@ -42,22 +59,22 @@ class SendNotificationResponse(BaseModel):
     errors: Optional[int] = None
 
 
-async def process_notification_async(notification_type: str, event_data: dict):
+async def process_notification_async(notification_type: str, event_data: EventData):
     """Process notification asynchronously in background."""
     try:
-        logger.info(f"Processing notification for event_id={event_data.get('event_id')}, type={notification_type}")
+        logger.info(f"Processing notification for event_id={event_data.event_id}, type={notification_type}")
         
-        # Create Event object from provided data
+        # Create Event object directly from the validated request model
         event = Event(
-            event_id=event_data.get('event_id', ''),
-            event_name=event_data.get('event_name', ''),
-            description=event_data.get('description'),
-            start_time=event_data.get('start_time', ''),
-            end_time=event_data.get('end_time', ''),
-            organizer_id=event_data.get('organizer_id', ''),
-            location=event_data.get('location', ''),
-            remaining_seats=event_data.get('remaining_seats', 0),
-            reminder_type=event_data.get('reminder_type')
+            event_id=event_data.event_id,
+            event_name=event_data.event_name,
+            description=event_data.description,
+            start_time=event_data.start_time,
+            end_time=event_data.end_time,
+            organizer_id=event_data.organizer_id,
+            location=event_data.location,
+            remaining_seats=event_data.remaining_seats,
+            reminder_type=event_data.reminder_type
         )
         
         # Create notification message
@@ -66,27 +83,92 @@ async def process_notification_async(notification_type: str, event_data: dict):
             event=event
         )
         
-        # Process notification
-        processor = NotificationProcessor()
-        await processor.process(message)
+        # Process notification with the shared processor
+        await get_notification_processor().process(message)
         
-        logger.info(f"Successfully processed notification for event_id={event_data.get('event_id')}")
+        logger.info(f"Successfully processed notification for event_id={event_data.event_id}")
             
     except Exception as e:
         logger.error(f"Error processing notification: {e}", exc_info=True)
 
 
+def notification_key(notification_type: str, event_id: str) -> str:
+    """Build the key identifying a queued or running notification."""
+    return f"{event_id}:{notification_type}"
+
+
+async def notification_worker(queue: asyncio.Queue, inflight: set):
+    """Process queued notifications one at a time until cancelled."""
+    while True:
+        notification_type, event_data = await queue.get()
+        try:
+            await process_notification_async(notification_type, event_data)
+        finally:
+            inflight.discard(notification_key(notification_type, event_data.event_id))
+            queue.task_done()
+
+
+def start_notification_workers(app: FastAPI):
+    """
+    Create the notification queue and its worker tasks on the running loop.
+    
+    Args:
+        app: FastAPI application whose state holds the queue and workers
+    """
+    queue = asyncio.Queue(maxsize=settings.api.notification_queue_size)
+    inflight = set()
+    app.state.notification_queue = queue
+    app.state.inflight_notifications = inflight
+    app.state.notification_workers = [
+        asyncio.create_task(notification_worker(queue, inflight))
+        for _ in range(settings.api.notification_workers)
+    ]
+    logger.info(
+        f"Started {settings.api.notification_workers} notification workers "
+        f"(queue size {settings.api.notification_queue_size})"
+    )
+
+
+async def stop_notification_workers(app: FastAPI, timeout: float = SHUTDOWN_DRAIN_TIMEOUT):
+    """
+    Stop the notification workers started by start_notification_workers().
+    
+    Notifications already accepted are given up to `timeout` seconds to
+    finish before the workers are cancelled; any still pending are logged.
+    
+    Args:
+        app: FastAPI application whose state holds the queue and workers
+        timeout: Maximum seconds to wait for the queue to drain
+    """
+    workers = getattr(app.state, 'notification_workers', [])
+    queue = getattr(app.state, 'notification_queue', None)
+    if workers and queue is not None:
+        try:
+            await asyncio.wait_for(queue.join(), timeout)
+        except asyncio.TimeoutError:
+            dropped = sorted(app.state.inflight_notifications)
+            logger.error(
+                f"Shutdown drain timed out; dropping {len(dropped)} notifications: {dropped}"
+            )
+            
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    app.state.notification_workers = []
+    logger.info("Notification workers stopped")
+
+
 @router.post("/notifications/send", response_model=SendNotificationResponse)
 async def send_notification(
     request: SendNotificationRequest,
-    background_tasks: BackgroundTasks
+    http_request: Request
 ):
     """
     Manually trigger notifications for a specific event.
     
     Args:
         request: Contains type and event data
-        background_tasks: FastAPI background tasks
+        http_request: Incoming HTTP request (gives access to the worker queue)
         
     Returns:
         Response with success status and message
@@ -105,15 +187,27 @@ async def send_notification(
                 detail=f"Invalid type. Must be one of: {', '.join(valid_types)}"
             )
         
-        # Convert EventData to dict for background task
-        event_dict = request.event.model_dump()
-        
-        # Queue the notification processing in background
-        background_tasks.add_task(
-            process_notification_async,
-            request.type,
-            event_dict
-        )
+        # Collapse duplicate requests for a notification that is already queued or running
+        state = http_request.app.state
+        key = notification_key(request.type, request.event.event_id)
+        if key in state.inflight_notifications:
+            logger.info(f"Notification already in progress, skipping duplicate: {key}")
+            return SendNotificationResponse(
+                success=True,
+                message=f"Notification already queued for event {request.event.event_id}",
+                event_id=request.event.event_id
+            )
+            
+        # Hand off the frozen EventData model to the bounded worker pool;
+        # reject when it is saturated
+        try:
+            state.notification_queue.put_nowait((request.type, request.event))
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Notification queue is full, please retry later"
+            )
+        state.inflight_notifications.add(key)
         
         return SendNotificationResponse(
             success=True,
@@ -134,8 +228,4 @@ async def send_notification(
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "service": "notification-service",
-        "version": "1.0.0"
-    }
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
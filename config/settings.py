@@ -2,14 +2,15 @@
 Configuration settings for the notification service.
 """
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LavinMQConfig:
     """LavinMQ connection configuration."""
     host: str = os.getenv('LAVINMQ_HOST', 'localhost')
@@ -18,9 +19,13 @@ class LavinMQConfig:
     password: str = os.getenv('LAVINMQ_PASSWORD', 'guest')
     queue_name: str = os.getenv('LAVINMQ_QUEUE', 'event_notifications')
     virtual_host: str = os.getenv('LAVINMQ_VHOST', '/')
+    prefetch_count: int = int(os.getenv('LAVINMQ_PREFETCH_COUNT', '100'))
+    ack_batch_size: int = int(os.getenv('LAVINMQ_ACK_BATCH_SIZE', '50'))
+    ack_flush_interval: float = float(os.getenv('LAVINMQ_ACK_FLUSH_INTERVAL', '0.2'))  # seconds
+    consumer_concurrency: int = int(os.getenv('LAVINMQ_CONSUMER_CONCURRENCY', '8'))
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DatabaseConfig:
     """Database configuration."""
     # Main database (for bookings)
@@ -34,9 +39,14 @@ class DatabaseConfig:
         os.getenv('DATABASE_URL', 'sqlite:///notification_service.db')  # Fallback to main DB
     )
     echo: bool = os.getenv('DATABASE_ECHO', 'False').lower() == 'true'
+    # Connection pool sizing (per engine; ignored for SQLite). Each process may open
+    # two engines, so the defaults stay small; raise them per deployment.
+    pool_size: int = int(os.getenv('DATABASE_POOL_SIZE', '5'))
+    max_overflow: int = int(os.getenv('DATABASE_MAX_OVERFLOW', '10'))
+    pool_recycle: int = int(os.getenv('DATABASE_POOL_RECYCLE', '300'))  # seconds
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class EmailConfig:
     """Email service configuration."""
     # Provider selection: 'smtp' or 'sendgrid'
@@ -47,6 +57,8 @@ class EmailConfig:
     smtp_port: int = int(os.getenv('SMTP_PORT', '587'))
     smtp_username: str = os.getenv('SMTP_USERNAME', '')
     smtp_password: str = os.getenv('SMTP_PASSWORD', '')
+    smtp_pool_size: int = int(os.getenv('SMTP_POOL_SIZE', '4'))  # Connections shared by a batch
+    max_concurrent: int = int(os.getenv('EMAIL_MAX_CONCURRENT', '32'))  # Sends in flight per batch
     use_tls: bool = os.getenv('SMTP_USE_TLS', 'True').lower() == 'true'
     
     # SendGrid configuration
@@ -60,64 +72,72 @@ class EmailConfig:
     dummy_mode: bool = os.getenv('EMAIL_DUMMY_MODE', 'True').lower() == 'true'
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ProcessorConfig:
     """Notification processor configuration."""
     batch_size: int = int(os.getenv('BATCH_SIZE', '100'))
+    # Batches emailed at once; each has up to EMAIL_MAX_CONCURRENT sends in flight
+    max_parallel_batches: int = int(os.getenv('MAX_PARALLEL_BATCHES', '4'))
     max_retries: int = 3
     retry_delay: int = 5  # seconds
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BookingServiceConfig:
     """Booking service API configuration."""
     base_url: str = os.getenv('BOOKING_SERVICE_URL', 'http://localhost:8000')
     timeout: int = int(os.getenv('BOOKING_SERVICE_TIMEOUT', '30'))
+    # Maximum concurrent requests per client, to avoid overwhelming the service
+    max_inflight: int = int(os.getenv('BOOKING_MAX_INFLIGHT', '16'))
+    # Multiplex requests over one connection when the h2 package is installed
+    http2: bool = os.getenv('BOOKING_SERVICE_HTTP2', 'True').lower() == 'true'
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SchedulerConfig:
     """Scheduler configuration."""
     cron_expression: str = os.getenv('SCHEDULER_INTERVAL', '* * * * *')
+    # How long a cached "next reminder due" time may skip polls (0 disables);
+    # reminders are inserted by other services, so this bounds how late a new one can be
+    next_due_cache_ttl: int = int(os.getenv('SCHEDULER_NEXT_DUE_TTL', '60'))  # seconds
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class APIConfig:
     """API server configuration."""
     host: str = os.getenv('API_HOST', '0.0.0.0')
     port: int = int(os.getenv('API_PORT', '8001'))
     enabled: bool = os.getenv('API_ENABLED', 'True').lower() == 'true'
+    # Background workers draining the manual notification queue
+    notification_workers: int = int(os.getenv('NOTIFICATION_WORKERS', '8'))
+    notification_queue_size: int = int(os.getenv('NOTIFICATION_QUEUE_SIZE', '1000'))
+    # Default executor size for blocking calls (DNS lookups, to_thread, run_in_executor)
+    thread_pool_size: int = int(os.getenv('THREAD_POOL_SIZE', '64'))
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Settings:
     """Application settings container."""
-    lavinmq: LavinMQConfig = None
-    database: DatabaseConfig = None
-    email: EmailConfig = None
-    processor: ProcessorConfig = None
-    scheduler: SchedulerConfig = None
-    booking_service: BookingServiceConfig = None
-    api: APIConfig = None
+    lavinmq: LavinMQConfig = field(default_factory=LavinMQConfig)
+    database: DatabaseConfig = field(default_factory=DatabaseConfig)
+    email: EmailConfig = field(default_factory=EmailConfig)
+    processor: ProcessorConfig = field(default_factory=ProcessorConfig)
+    scheduler: SchedulerConfig = field(default_factory=SchedulerConfig)
+    booking_service: BookingServiceConfig = field(default_factory=BookingServiceConfig)
+    api: APIConfig = field(default_factory=APIConfig)
     log_level: str = os.getenv('LOG_LEVEL', 'INFO')
     log_format: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get the application settings, parsed from the environment once per process.
     
-    def __post_init__(self):
-        """Initialize config objects if not provided."""
-        if self.lavinmq is None:
-            self.lavinmq = LavinMQConfig()
-        if self.database is None:
-            self.database = DatabaseConfig()
-        if self.email is None:
-            self.email = EmailConfig()
-        if self.processor is None:
-            self.processor = ProcessorConfig()
-        if self.scheduler is None:
-            self.scheduler = SchedulerConfig()
-        if self.booking_service is None:
-            self.booking_service = BookingServiceConfig()
-        if self.api is None:
-            self.api = APIConfig()
+    Returns:
+        Shared, immutable Settings instance
+    """
+    return Settings()
 
 
 # Global settings instance
-settings = Settings()
+settings = get_settings()
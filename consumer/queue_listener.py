@@ -4,27 +4,114 @@ LavinMQ consumer using pika (AMQP protocol).
 import pika
 import json
 import asyncio
+import functools
+from typing import Optional
 from models.dto import NotificationMessage
-from processor.notification_processor import NotificationProcessor
+from processor.notification_processor import NotificationProcessor, new_event_loop
 from data.repository import ParticipantRepository
 from config.settings import settings
 import logging
-import signal
-import sys
+import threading
+import time
+from collections import OrderedDict
+
+# orjson parses message bodies straight from bytes, several times faster than the stdlib
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
 
+class _TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed number of seconds."""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+                
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+                
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        """Store value for key, evicting the least recently used entry if full."""
+        if self.ttl <= 0:
+            return
+            
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# Event names looked up for reminder enrichment, keyed by event_id
+EVENT_NAME_CACHE_MAXSIZE = 10_000
+EVENT_NAME_CACHE_TTL = 300  # seconds
+_event_name_cache = _TTLCache(EVENT_NAME_CACHE_MAXSIZE, EVENT_NAME_CACHE_TTL)
+
+# On shutdown, how long to wait for in-flight deliveries to finish and be settled
+SHUTDOWN_DRAIN_TIMEOUT = 30  # seconds
+
+
 class QueueListener:
     """LavinMQ/RabbitMQ consumer that listens for notification messages."""
     
-    def __init__(self):
-        """Initialize queue listener with LavinMQ configuration."""
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Initialize queue listener with LavinMQ configuration.
+        
+        Args:
+            loop: Optional running event loop to process messages on (e.g. the
+                API server's). If not provided, the listener starts its own loop thread.
+        """
         self.config = settings.lavinmq
         self.connection = None
         self.channel = None
         self.should_stop = False
         self.processor = NotificationProcessor()
+        # Shared across deliveries; the session only connects on first use
+        self.repo = ParticipantRepository()
+        
+        # Acks are batched; never wait for more messages than the broker will deliver
+        self.ack_batch_size = max(1, min(self.config.ack_batch_size, self.config.prefetch_count))
+        self._pending_tags = []
+        self._last_ack = time.monotonic()
+        self._ack_timer = None
+        
+        # One long-lived event loop for all deliveries instead of asyncio.run per message
+        self._owns_loop = loop is None
+        if self._owns_loop:
+            self._loop = new_event_loop()
+            self._loop_thread = threading.Thread(
+                target=self._loop.run_forever,
+                name="queue-listener-loop",
+                daemon=True
+            )
+            self._loop_thread.start()
+        else:
+            self._loop = loop
+            self._loop_thread = None
+        
+        # Deliveries being processed on the loop, at most consumer_concurrency at a time
+        self._in_flight = set()
+        self._concurrency = asyncio.Semaphore(max(1, self.config.consumer_concurrency))
         
         logger.info(
             f"QueueListener initialized for queue: {self.config.queue_name}"
@@ -62,8 +149,8 @@ class QueueListener:
                 durable=True  # Survive broker restart
             )
             
-            # Set QoS to process one message at a time
-            self.channel.basic_qos(prefetch_count=1)
+            # Let the broker keep a window of unacked messages in flight
+            self.channel.basic_qos(prefetch_count=self.config.prefetch_count)
             
             logger.info("Successfully connected to LavinMQ")
             
@@ -71,6 +158,78 @@ class QueueListener:
             logger.error(f"Failed to connect to LavinMQ: {e}")
             raise
     
+    def _ack(self, channel, delivery_tag: int):
+        """
+        Queue a delivery tag for a batched acknowledgment.
+        
+        The batch is flushed once ack_batch_size tags are pending or
+        ack_flush_interval has elapsed; a timer covers the idle case.
+        
+        Args:
+            channel: Pika channel
+            delivery_tag: Delivery tag of the processed message
+        """
+        self._pending_tags.append(delivery_tag)
+        
+        elapsed = time.monotonic() - self._last_ack
+        if len(self._pending_tags) >= self.ack_batch_size or elapsed >= self.config.ack_flush_interval:
+            self._flush_acks(channel)
+        elif self._ack_timer is None and self.connection:
+            self._ack_timer = self.connection.call_later(
+                self.config.ack_flush_interval,
+                self._flush_acks
+            )
+    
+    def _flush_acks(self, channel=None):
+        """
+        Acknowledge every pending delivery with a single multiple=True ack.
+        
+        Args:
+            channel: Pika channel (defaults to the listener's channel)
+        """
+        channel = channel or self.channel
+        
+        if self._ack_timer is not None:
+            if self.connection and self.connection.is_open:
+                self.connection.remove_timeout(self._ack_timer)
+            self._ack_timer = None
+            
+        if not self._pending_tags:
+            return
+            
+        if channel and channel.is_open:
+            if self._in_flight and self._pending_tags[-1] > min(self._in_flight):
+                # An earlier delivery is still processing; a cumulative ack would cover it too
+                for tag in self._pending_tags:
+                    channel.basic_ack(delivery_tag=tag)
+            else:
+                channel.basic_ack(delivery_tag=self._pending_tags[-1], multiple=True)
+            logger.debug(f"Acknowledged {len(self._pending_tags)} messages")
+        self._pending_tags.clear()
+        self._last_ack = time.monotonic()
+    
+    def _get_event_name(self, event_id: str) -> Optional[str]:
+        """
+        Look up an event's name for reminder enrichment.
+        
+        Names are cached for EVENT_NAME_CACHE_TTL seconds so reminders for the
+        same event share one lookup through a single long-lived repository.
+        
+        Args:
+            event_id: The event ID (UUID string)
+            
+        Returns:
+            The event name, or None if the event has no participants
+        """
+        event_name = _event_name_cache.get(event_id)
+        if event_name is not None:
+            return event_name
+            
+        event_name = self.repo.get_event_name(event_id)
+        if event_name is not None:
+            _event_name_cache.set(event_id, event_name)
+        return event_name
+    
     def _on_message(self, channel, method, properties, body):
         """
         Callback when a message is received from the queue.
@@ -82,12 +241,9 @@ class QueueListener:
             body: Message body (bytes)
         """
         try:
-            # Decode message
-            message_str = body.decode('utf-8')
-            logger.info(f"Received message: {message_str}")
-            
-            # Parse JSON to check message type
-            message_data = json.loads(message_str)
+            # Parse JSON straight from the body bytes to check message type
+            message_data = _json_loads(body)
+            logger.info(f"Received message: {message_data}")
             
             # Handle event_reminder messages specially
             if message_data.get('type') == 'event_reminder':
@@ -97,62 +253,110 @@ class QueueListener:
                 
                 if not event_id or not reminder_type:
                     logger.error("Reminder message missing event_id or reminder_type")
-                    channel.basic_ack(delivery_tag=method.delivery_tag)
+                    self._ack(channel, method.delivery_tag)
                     return
                 
-                # Fetch event details from database
+                # Fetch event details (cached per event_id)
+                event_name = self._get_event_name(event_id)
                 
-                with ParticipantRepository() as repo:
-                    # Get one participant to extract event details
-                    participants = repo.get_participants_by_event(event_id, offset=0, limit=1)
-                    
-                    if not participants:
-                        logger.warning(f"No participants found for event {event_id}, skipping reminder")
-                        channel.basic_ack(delivery_tag=method.delivery_tag)
-                        return
-                    
-                    # Extract event details from participant
-                    participant = participants[0]
-                    event_name = participant.event_name or "Event"
+                if event_name is None:
+                    logger.warning(f"No participants found for event {event_id}, skipping reminder")
+                    self._ack(channel, method.delivery_tag)
+                    return
                     
-                    # Construct full message with event object
-                    full_message = {
-                        "type": "event_reminder",
-                        "event": {
-                            "event_id": event_id,
-                            "event_name": event_name,
-                            "description": None,
-                            "start_time": "",
-                            "end_time": "",
-                            "organizer_id": "",
-                            "location": "",
-                            "remaining_seats": 0,
-                            "reminder_type": reminder_type
-                        }
+                # Construct full message with event object
+                full_message = {
+                    "type": "event_reminder",
+                    "event": {
+                        "event_id": event_id,
+                        "event_name": event_name,
+                        "description": None,
+                        "start_time": "",
+                        "end_time": "",
+                        "organizer_id": "",
+                        "location": "",
+                        "remaining_seats": 0,
+                        "reminder_type": reminder_type
                     }
+                }
                     
-                    message_str = json.dumps(full_message)
-                    logger.info(f"Enriched reminder message with event details")
+                message_data = full_message
+                logger.info(f"Enriched reminder message with event details")
             
-            # Parse message into DTO
-            message = NotificationMessage.from_json(message_str)
+            # Build the DTO from the decoded dict (no re-serialize/re-parse)
+            message = NotificationMessage.from_dict(message_data)
             
-            # Process the message
-            asyncio.run(self.processor.process(message))
-            
-            # Acknowledge message
-            channel.basic_ack(delivery_tag=method.delivery_tag)
-            logger.info(f"Message processed and acknowledged: {message}")
+            # Hand the message to the event loop so several deliveries are processed
+            # concurrently; it is settled on this thread once processing finishes
+            future = asyncio.run_coroutine_threadsafe(
+                self._process_limited(message),
+                self._loop
+            )
+            # Track the tag only once submitted, so a failed submit never leaves it behind
+            self._in_flight.add(method.delivery_tag)
+            future.add_done_callback(
+                functools.partial(self._settle_threadsafe, channel, method.delivery_tag, message)
+            )
             
         except ValueError as e:
             logger.error(f"Invalid message format: {e}")
             # Acknowledge invalid messages to remove them from queue
-            channel.basic_ack(delivery_tag=method.delivery_tag)
+            self._ack(channel, method.delivery_tag)
         except Exception as e:
             logger.error(f"Error processing message: {e}", exc_info=True)
-            # Negative acknowledgment - message will be requeued
+            # Keep the shared repository usable for the next delivery
+            self.repo.session.rollback()
+            # Settle earlier successes first, then negative acknowledgment - message will be requeued
+            self._flush_acks(channel)
             channel.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
     
+    async def _process_limited(self, message: NotificationMessage):
+        """Process a message once a concurrency slot is free."""
+        async with self._concurrency:
+            await self.processor.process(message)
+    
+    def _settle_threadsafe(self, channel, delivery_tag: int, message: NotificationMessage, future):
+        """Schedule settlement of a finished delivery on the connection thread."""
+        try:
+            self.connection.add_callback_threadsafe(
+                functools.partial(self._settle, channel, delivery_tag, message, future)
+            )
+        except Exception as e:
+            # Connection is gone; the broker will redeliver the unacked message
+            logger.error(f"Could not settle delivery {delivery_tag}: {e}")
+    
+    def _settle(self, channel, delivery_tag: int, message: NotificationMessage, future):
+        """
+        Acknowledge or reject a delivery whose processing has finished.
+        
+        Runs on the connection thread, since pika channels are not thread-safe.
+        
+        Args:
+            channel: Pika channel the message arrived on
+            delivery_tag: Delivery tag of the message
+            message: The processed NotificationMessage
+            future: Completed processing future
+        """
+        self._in_flight.discard(delivery_tag)
+        try:
+            future.result()
+        except ValueError as e:
+            logger.error(f"Invalid message format: {e}")
+            # Acknowledge invalid messages to remove them from queue
+            self._ack(channel, delivery_tag)
+            return
+        except Exception as e:
+            logger.error(f"Error processing message: {e}", exc_info=True)
+            # Settle earlier successes first, then negative acknowledgment - message will be requeued
+            self._flush_acks(channel)
+            if channel.is_open:
+                channel.basic_nack(delivery_tag=delivery_tag, requeue=True)
+            return
+            
+        # Acknowledge message (batched)
+        self._ack(channel, delivery_tag)
+        logger.info(f"Message processed and acknowledged: {message}")
+    
     def start(self):
         """Start listening for messages."""
         try:
@@ -182,19 +386,69 @@ class QueueListener:
         finally:
             if self.connection and self.connection.is_open:
                 try:
+                    # Settle deliveries still processing before the connection goes away
+                    self._drain_in_flight(SHUTDOWN_DRAIN_TIMEOUT)
+                    self._flush_acks()
                     self.connection.close()
                     logger.info("Connection closed in start() finally block")
                 except Exception as e:
                     logger.error(f"Error closing connection: {e}")
+            
+            # Only now is nothing left running on the loop
+            self._stop_loop()
+            self.repo.close()
+    
+    def _drain_in_flight(self, timeout: float):
+        """
+        Wait for in-flight deliveries to finish and be acked or nacked.
+        
+        Runs on the connection thread; processing connection events is what
+        runs the _settle callbacks scheduled by finished deliveries.
+        
+        Args:
+            timeout: Maximum seconds to wait
+        """
+        deadline = time.monotonic() + timeout
+        if self._in_flight:
+            logger.info(f"Waiting for {len(self._in_flight)} in-flight deliveries to finish")
+            
+        while self._in_flight and self.connection.is_open:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Left unacked; the broker redelivers them
+                logger.warning(
+                    f"Shutting down with {len(self._in_flight)} deliveries still in flight"
+                )
+                return
+            self.connection.process_data_events(time_limit=min(remaining, 0.1))
+    
+    async def _close_loop_resources(self):
+        """Close loop-bound connections, then stop the loop if the listener owns it."""
+        try:
+            await self.processor.close()
+        except Exception as e:
+            logger.error(f"Error closing notification processor: {e}")
+        finally:
+            if self._owns_loop:
+                self._loop.stop()
+    
+    def _stop_loop(self):
+        """Close the processor's connections and stop an owned loop (a borrowed loop is left running)."""
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._close_loop_resources(), self._loop)
+            logger.debug("Listener event loop resources closed")
     
     def stop(self):
         """Stop listening and close connections gracefully."""
         logger.info("Stopping queue listener...")
         
         def _stop_consuming():
+            self._flush_acks()
             if self.channel and self.channel.is_open:
                 self.channel.stop_consuming()
                 logger.info("Channel stop_consuming called")
+            # start() then drains in-flight deliveries, closes the connection
+            # and stops the loop
 
         try:
             if self.connection and self.connection.is_open:
@@ -203,24 +457,8 @@ class QueueListener:
                  # Fallback if connection is somehow not open but channel is? Unlikely.
                  # Or if we are in the same thread (unlikely given the usage plan).
                  self.channel.stop_consuming()
+                 self._stop_loop()
+            else:
+                self._stop_loop()
         except Exception as e:
             logger.error(f"Error scheduling stop_consuming: {e}")
-        
-        # We can't close the connection here immediately because stop_consuming is async
-        # The start() method will return after stop_consuming finishes, then we can close.
-        # But start() is in a loop.
-        # Actually, start_consuming blocks. When stop_consuming is processed, start_consuming returns.
-        # Then we can close.
-        
-        # However, we need to ensure the connection is closed.
-        # The start() method doesn't close the connection after start_consuming returns.
-        # We should update start() to close connection in finally block?
-        # Or just rely on the fact that we will close it here?
-        # If we close it here, we might race with the loop.
-        
-        # Let's look at start():
-        # self.channel.start_consuming()
-        # ...
-        
-        # If we just stop consuming, start_consuming returns.
-        # Then we should close the connection.
@@ -1,7 +1,7 @@
 """
 Database setup and models using SQLAlchemy.
 """
-from sqlalchemy import create_engine, Integer, String, Column
+from sqlalchemy import create_engine, inspect, Integer, String, Column
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker, Session
 from config.settings import settings
 import logging
@@ -43,17 +43,28 @@ class Participant(Base):
         return f"<Participant(booking_id={self.booking_id}, event_id={self.event_id}, user_email={self.user_email})>"
 
 
+def _create_engine(url: str):
+    """Create an engine with explicit pool sizing for server databases."""
+    options = {"echo": settings.database.echo}
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.database.pool_size,
+            max_overflow=settings.database.max_overflow,
+            pool_recycle=settings.database.pool_recycle,
+            pool_pre_ping=True
+        )
+    return create_engine(url, **options)
+
+
 # Create database engine
-engine = create_engine(
-    settings.database.connection_string,
-    echo=settings.database.echo
-)
+engine = _create_engine(settings.database.connection_string)
 
-# Create notification database engine (for event_reminder table)
-notification_engine = create_engine(
-    settings.database.notification_db_url,
-    echo=settings.database.echo
-)
+# Create notification database engine (for event_reminder table); when both
+# point at the same database, share one engine and connection pool
+if settings.database.notification_db_url == settings.database.connection_string:
+    notification_engine = engine
+else:
+    notification_engine = _create_engine(settings.database.notification_db_url)
 
 # Session factory
 SessionLocal = sessionmaker(bind=engine)
@@ -62,15 +73,56 @@ SessionLocal = sessionmaker(bind=engine)
 NotificationSessionLocal = sessionmaker(bind=notification_engine)
 
 
-def init_database():
-    """Initialize database tables."""
-    logger.info("Initializing database...")
+def _create_schema(bind, force: bool = False):
+    """
+    Create missing tables and indexes on one database.
+    
+    Reads the catalog twice (table names, then every table's indexes in one
+    call) instead of create_all's lookup per table, and only issues DDL for
+    what is missing. Indexes added to the models after their tables were
+    created are picked up too, which create_all never does.
+    """
+    if force:
+        Base.metadata.create_all(bind=bind)
+        
+    inspector = inspect(bind)
+    existing = set(inspector.get_table_names())
+    tables = Base.metadata.sorted_tables
     
-    # Create tables in main database
-    Base.metadata.create_all(bind=engine)
+    # New tables are created along with their indexes
+    missing = [table for table in tables if table.name not in existing]
+    if missing:
+        Base.metadata.create_all(bind=bind, tables=missing)
+        
+    present = [table for table in tables if table.name in existing]
+    if not present:
+        return
+        
+    indexes = inspector.get_multi_indexes(filter_names=[table.name for table in present])
+    for table in present:
+        index_names = {index['name'] for index in indexes.get((None, table.name), [])}
+        for index in table.indexes:
+            if index.name not in index_names:
+                logger.info(f"Creating missing index {index.name} on {table.name}")
+                index.create(bind=bind)
+
+
+def init_database(force: bool = False):
+    """
+    Initialize database tables.
+    
+    Only missing tables and indexes are created, found with a couple of
+    catalog queries per database.
+    
+    Args:
+        force: Also run a full create_all, even when every table already exists
+    """
+    logger.info("Initializing database...")
     
-    # Create tables in notification database
-    Base.metadata.create_all(bind=notification_engine)
+    # The engines may be one shared engine; initialize each database once
+    for bind in dict.fromkeys((engine, notification_engine)):
+        # Create tables in the main (bookings) and notification databases
+        _create_schema(bind, force=force)
     
     logger.info("Database initialized successfully")
 
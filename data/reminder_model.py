@@ -1,7 +1,7 @@
 """
 SQLAlchemy model for event reminders.
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, text
 from data.database import Base
 import logging
 
@@ -11,6 +11,21 @@ logger = logging.getLogger(__name__)
 class EventReminder(Base):
     """Event reminder model for scheduled notifications."""
     __tablename__ = 'event_reminders'
+    __table_args__ = (
+        # Partial indexes covering only unsent reminders, matching the scheduler's pending scans
+        Index(
+            'ix_reminders_pending_1d',
+            'before_one_day',
+            postgresql_where=text('notification_sent_for_one_day = false'),
+            sqlite_where=text('notification_sent_for_one_day = 0')
+        ),
+        Index(
+            'ix_reminders_pending_1h',
+            'before_one_hour',
+            postgresql_where=text('notification_sent_for_one_hour = false'),
+            sqlite_where=text('notification_sent_for_one_hour = 0')
+        ),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     event_id = Column(String(255), nullable=False, index=True)
@@ -3,14 +3,110 @@ Repository for event reminder operations.
 """
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import and_, bindparam, exists, func, or_, select, text, update
 from datetime import datetime, timezone
 from data.database import get_notification_session
 from data.reminder_model import EventReminder
+from config.settings import settings
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Statements are built once at import so their compiled form is reused on every poll
+_PENDING_ONE_DAY_STMT = (
+    select(EventReminder)
+    .where(
+        EventReminder.before_one_day <= bindparam("now"),
+        EventReminder.notification_sent_for_one_day.is_(False)
+    )
+    .order_by(EventReminder.before_one_day)
+)
+
+_PENDING_ONE_HOUR_STMT = (
+    select(EventReminder)
+    .where(
+        EventReminder.before_one_hour <= bindparam("now"),
+        EventReminder.notification_sent_for_one_hour.is_(False)
+    )
+    .order_by(EventReminder.before_one_hour)
+)
+
+_MARK_ONE_DAY_SENT_STMT = text("""
+    UPDATE event_reminders
+    SET notification_sent_for_one_day = true
+    WHERE id = :reminder_id
+""")
+
+_MARK_ONE_HOUR_SENT_STMT = text("""
+    UPDATE event_reminders
+    SET notification_sent_for_one_hour = true
+    WHERE id = :reminder_id
+""")
+
+
+def _claim_stmt(due_column, sent_column):
+    """
+    Build an atomic claim: flag up to :limit due reminders as sent and return them.
+    
+    FOR UPDATE SKIP LOCKED lets concurrent schedulers claim disjoint rows on
+    Postgres; dialects without row locks (e.g. SQLite) simply omit it.
+    """
+    due_ids = (
+        select(EventReminder.id)
+        .where(due_column <= bindparam("now"), sent_column.is_(False))
+        .order_by(due_column)
+        .limit(bindparam("limit"))
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(EventReminder)
+        .where(EventReminder.id.in_(due_ids.scalar_subquery()))
+        .values({sent_column: True})
+        .returning(EventReminder)
+        .execution_options(synchronize_session=False)
+    )
+
+
+_CLAIM_ONE_DAY_STMT = _claim_stmt(
+    EventReminder.before_one_day,
+    EventReminder.notification_sent_for_one_day
+)
+
+_CLAIM_ONE_HOUR_STMT = _claim_stmt(
+    EventReminder.before_one_hour,
+    EventReminder.notification_sent_for_one_hour
+)
+
+_NEXT_ONE_DAY_DUE_STMT = (
+    select(func.min(EventReminder.before_one_day))
+    .where(EventReminder.notification_sent_for_one_day.is_(False))
+)
+
+_NEXT_ONE_HOUR_DUE_STMT = (
+    select(func.min(EventReminder.before_one_hour))
+    .where(EventReminder.notification_sent_for_one_hour.is_(False))
+)
+
+# Cheap gate for the scheduler: is any reminder of either kind due?
+_ANY_PENDING_STMT = select(
+    exists().where(or_(
+        and_(
+            EventReminder.before_one_day <= bindparam("now"),
+            EventReminder.notification_sent_for_one_day.is_(False)
+        ),
+        and_(
+            EventReminder.before_one_hour <= bindparam("now"),
+            EventReminder.notification_sent_for_one_hour.is_(False)
+        )
+    ))
+)
+
+# Earliest unsent due time per sent-flag column, as (due_at, cache_expires_at).
+# Polls before due_at skip the database; the TTL bounds how late a reminder
+# inserted by another service can be picked up.
+_next_due_cache = {}
+
 
 class ReminderRepository:
     """Repository for managing event reminders."""
@@ -28,6 +124,9 @@ class ReminderRepository:
         else:
             self.session = get_notification_session()
             self._owns_session = True
+            
+        # (column, next due time) found by the open claim, cached on confirm
+        self._claimed_next_due = None
     
     def get_pending_one_day_reminders(self) -> List[EventReminder]:
         """
@@ -39,30 +138,10 @@ class ReminderRepository:
         try:
             now = datetime.now(timezone.utc)
             
-            query = text("""
-                SELECT id, event_id, before_one_day, before_one_hour,
-                       notification_sent_for_one_day, notification_sent_for_one_hour
-                FROM event_reminders
-                WHERE before_one_day <= :now
-                AND notification_sent_for_one_day = false
-                ORDER BY before_one_day
-            """)
-            
-            result = self.session.execute(query, {"now": now})
-            logger.debug(f"Found {result} pending one-day reminders")
-            reminders = []
-            for row in result:
-                reminder = EventReminder(
-                    id=row.id,
-                    event_id=row.event_id,
-                    before_one_day=row.before_one_day,
-                    before_one_hour=row.before_one_hour,
-                    notification_sent_for_one_day=row.notification_sent_for_one_day,
-                    notification_sent_for_one_hour=row.notification_sent_for_one_hour
-                )
-                reminders.append(reminder)
-            
-            logger.debug(f"Found {len(reminders)} pending one-day reminders")
+            # Rows load straight into ORM instances
+            reminders = list(self.session.scalars(_PENDING_ONE_DAY_STMT, {"now": now}))
+            
+            logger.debug("Found %d pending one-day reminders", len(reminders))
             return reminders
             
         except Exception as e:
@@ -79,36 +158,128 @@ class ReminderRepository:
         try:
             now = datetime.now(timezone.utc)
             
-            query = text("""
-                SELECT id, event_id, before_one_day, before_one_hour,
-                       notification_sent_for_one_day, notification_sent_for_one_hour
-                FROM event_reminders
-                WHERE before_one_hour <= :now
-                AND notification_sent_for_one_hour = false
-                ORDER BY before_one_hour
-            """)
-            
-            result = self.session.execute(query, {"now": now})
-            
-            reminders = []
-            for row in result:
-                reminder = EventReminder(
-                    id=row.id,
-                    event_id=row.event_id,
-                    before_one_day=row.before_one_day,
-                    before_one_hour=row.before_one_hour,
-                    notification_sent_for_one_day=row.notification_sent_for_one_day,
-                    notification_sent_for_one_hour=row.notification_sent_for_one_hour
-                )
-                reminders.append(reminder)
-            
-            logger.debug(f"Found {len(reminders)} pending one-hour reminders")
+            # Rows load straight into ORM instances
+            reminders = list(self.session.scalars(_PENDING_ONE_HOUR_STMT, {"now": now}))
+            
+            logger.debug("Found %d pending one-hour reminders", len(reminders))
             return reminders
             
         except Exception as e:
             logger.error(f"Error fetching one-hour reminders: {e}")
             raise
     
+    def any_pending(self) -> bool:
+        """
+        Check whether any one-day or one-hour reminder is due, with one EXISTS probe.
+        Skips the database entirely while the cached next-due times rule both kinds out.
+        
+        Returns:
+            True if at least one reminder is due
+        """
+        now = datetime.now(timezone.utc)
+        if _nothing_due('notification_sent_for_one_day', now) and \
+                _nothing_due('notification_sent_for_one_hour', now):
+            return False
+            
+        try:
+            return bool(self.session.scalar(_ANY_PENDING_STMT, {"now": now}))
+            
+        except Exception as e:
+            self.session.rollback()
+            logger.error(f"Error checking for pending reminders: {e}")
+            raise
+    
+    def claim_pending_one_day(self, limit: int = 100) -> List[EventReminder]:
+        """
+        Atomically claim due one-day reminders by marking them sent.
+        
+        The claim is left uncommitted, so the rows stay locked against other
+        schedulers: callers publish the reminders, then call confirm_claimed(),
+        or release_claimed() if publishing failed. A crash before the commit
+        rolls the claim back and the reminders stay pending (at-least-once).
+        
+        Args:
+            limit: Maximum number of reminders to claim
+            
+        Returns:
+            List of claimed EventReminder objects
+        """
+        return self._claim(
+            _CLAIM_ONE_DAY_STMT,
+            _NEXT_ONE_DAY_DUE_STMT,
+            'notification_sent_for_one_day',
+            limit
+        )
+    
+    def claim_pending_one_hour(self, limit: int = 100) -> List[EventReminder]:
+        """
+        Atomically claim due one-hour reminders by marking them sent.
+        
+        The claim is left uncommitted, so the rows stay locked against other
+        schedulers: callers publish the reminders, then call confirm_claimed(),
+        or release_claimed() if publishing failed. A crash before the commit
+        rolls the claim back and the reminders stay pending (at-least-once).
+        
+        Args:
+            limit: Maximum number of reminders to claim
+            
+        Returns:
+            List of claimed EventReminder objects
+        """
+        return self._claim(
+            _CLAIM_ONE_HOUR_STMT,
+            _NEXT_ONE_HOUR_DUE_STMT,
+            'notification_sent_for_one_hour',
+            limit
+        )
+    
+    def confirm_claimed(self):
+        """Commit the open claim, recording the claimed reminders as sent."""
+        try:
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            self._claimed_next_due = None
+            logger.error(f"Error confirming claimed reminders: {e}")
+            raise
+            
+        if self._claimed_next_due is not None:
+            _remember_next_due(*self._claimed_next_due)
+            self._claimed_next_due = None
+    
+    def release_claimed(self):
+        """Roll back the open claim, returning the claimed reminders to pending."""
+        self.session.rollback()
+        self._claimed_next_due = None
+    
+    def _claim(self, stmt, next_due_stmt, column: str, limit: int) -> List[EventReminder]:
+        """Run a claim statement without committing, skipping it while nothing can be due."""
+        now = datetime.now(timezone.utc)
+        if _nothing_due(column, now):
+            logger.debug("Skipping %s poll; next reminder not yet due", column)
+            return []
+            
+        try:
+            reminders = list(self.session.scalars(stmt, {"now": now, "limit": limit}))
+            
+            # Detach so the commit doesn't expire them and force a reload per reminder
+            for reminder in reminders:
+                self.session.expunge(reminder)
+                
+            # Drained everything due: look up when the next one becomes due, in the
+            # same transaction; it is cached once confirm_claimed() commits
+            self._claimed_next_due = None
+            if len(reminders) < limit:
+                self._claimed_next_due = (column, self.session.scalar(next_due_stmt))
+                
+            logger.debug("Claimed %d pending reminders (%s)", len(reminders), column)
+            return reminders
+            
+        except Exception as e:
+            self.session.rollback()
+            logger.error(f"Error claiming reminders ({column}): {e}")
+            raise
+    
     def mark_one_day_sent(self, reminder_id: int) -> bool:
         """
         Mark one-day reminder as sent.
@@ -120,16 +291,10 @@ class ReminderRepository:
             True if updated successfully
         """
         try:
-            query = text("""
-                UPDATE event_reminders
-                SET notification_sent_for_one_day = true
-                WHERE id = :reminder_id
-            """)
-            
-            self.session.execute(query, {"reminder_id": reminder_id})
+            self.session.execute(_MARK_ONE_DAY_SENT_STMT, {"reminder_id": reminder_id})
             self.session.commit()
             
-            logger.debug(f"Marked one-day reminder {reminder_id} as sent")
+            logger.debug("Marked one-day reminder %s as sent", reminder_id)
             return True
             
         except Exception as e:
@@ -148,16 +313,10 @@ class ReminderRepository:
             True if updated successfully
         """
         try:
-            query = text("""
-                UPDATE event_reminders
-                SET notification_sent_for_one_hour = true
-                WHERE id = :reminder_id
-            """)
-            
-            self.session.execute(query, {"reminder_id": reminder_id})
+            self.session.execute(_MARK_ONE_HOUR_SENT_STMT, {"reminder_id": reminder_id})
             self.session.commit()
             
-            logger.debug(f"Marked one-hour reminder {reminder_id} as sent")
+            logger.debug("Marked one-hour reminder %s as sent", reminder_id)
             return True
             
         except Exception as e:
@@ -178,3 +337,28 @@ class ReminderRepository:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
         self.close()
+
+
+def _nothing_due(column: str, now: datetime) -> bool:
+    """Return True if the cached next-due time proves no reminder is due yet."""
+    cached = _next_due_cache.get(column)
+    if cached is None:
+        return False
+        
+    due_at, expires_at = cached
+    if time.monotonic() >= expires_at:
+        return False
+    return due_at is None or now < due_at
+
+
+def _remember_next_due(column: str, due_at: Optional[datetime]):
+    """Cache the earliest unsent due time for a sent-flag column."""
+    # Reminder times are stored as naive UTC
+    if due_at is not None and due_at.tzinfo is None:
+        due_at = due_at.replace(tzinfo=timezone.utc)
+    _next_due_cache[column] = (due_at, time.monotonic() + settings.scheduler.next_due_cache_ttl)
+
+
+def clear_next_due_cache():
+    """Forget cached next-due times (e.g. after inserting new reminders)."""
+    _next_due_cache.clear()
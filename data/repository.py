@@ -1,14 +1,40 @@
 """
 Repository for participant data access with pagination support.
 """
+import csv
+import io
 from typing import List, Optional
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from data.database import Participant, get_session, close_session
-from api.booking_client import BookingAPIClient
+from api.booking_client import BookingAPIClient, get_booking_client
+from models.dto import BookingBatchResponse
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows per bulk INSERT; keeps statement size bounded on very large imports
+BULK_INSERT_CHUNK_SIZE = 10_000
+
+# Imports larger than this are streamed with PostgreSQL COPY instead of INSERT
+COPY_THRESHOLD = 5_000
+_COPY_COLUMNS = ('booking_id', 'event_id', 'user_id', 'user_email', 'event_name', 'booking_time', 'status')
+
+# INSERT ... ON CONFLICT (booking_id) DO NOTHING RETURNING booking_id, per dialect
+# that supports it; existing bookings are skipped inside the statement
+_INSERT_SKIP_EXISTING_STMTS = {
+    name: (
+        insert(Participant.__table__)
+        .on_conflict_do_nothing(index_elements=['booking_id'])
+        .returning(Participant.__table__.c.booking_id)
+    )
+    for name, insert in (('postgresql', postgresql.insert), ('sqlite', sqlite.insert))
+}
+
+# Booking IDs quoted in the single warning about skipped bookings
+_SKIPPED_IDS_LOGGED = 10
+
 
 class ParticipantRepository:
     """Repository for managing participant data access."""
@@ -18,24 +44,31 @@ class ParticipantRepository:
         Initialize repository.
         
         Args:
-            booking_client: Optional BookingAPIClient. If not provided, a new one will be created.
-            session: Optional SQLAlchemy session. If not provided, a new session will be created.
+            booking_client: Optional BookingAPIClient. If not provided, the shared client is used.
+            session: Optional SQLAlchemy session to share a transaction with. If not provided,
+                one is opened on first database use (read paths go to the booking API and never need it).
         """
-        self.booking_client = booking_client or BookingAPIClient()
-        self.session = session
+        self.booking_client = booking_client or get_booking_client()
+        self._session = session
         self._owns_session = session is None
-        if self._owns_session:
-            self.session = get_session()
+    
+    @property
+    def session(self) -> Session:
+        """Database session, created lazily when first needed."""
+        if self._session is None:
+            self._session = get_session()
+        return self._session
     
     def get_participants_by_event(
         self, 
         event_id: str,  # Changed to str for UUID support
         offset: int = 0, 
         limit: int = 100
-    ) -> List[Participant]:
+    ) -> List[BookingBatchResponse]:
         """
         Retrieve participants for a specific event with pagination.
-        Uses the BookingAPIClient to fetch booking data.
+        Uses the BookingAPIClient to fetch booking data and returns the
+        lightweight booking records as-is (no detached ORM rows are built).
         
         Args:
             event_id: The event ID to filter participants (UUID string)
@@ -43,7 +76,7 @@ class ParticipantRepository:
             limit: Maximum number of records to return
             
         Returns:
-            List of Participant objects
+            List of BookingBatchResponse objects (same fields as Participant)
         """
         try:
             logger.debug(
@@ -52,26 +85,12 @@ class ParticipantRepository:
             )
             
             # Fetch bookings from API
-            bookings = self.booking_client.get_bookings_batch(
+            participants = self.booking_client.get_bookings_batch(
                 event_id=event_id,
                 offset=offset,
                 batch_size=limit
             )
             
-            # Convert to Participant objects
-            participants = []
-            for booking in bookings:
-                participant = Participant(
-                    booking_id=booking.booking_id,
-                    event_id=booking.event_id,
-                    user_id=booking.user_id,
-                    user_email=booking.user_email,
-                    event_name=booking.event_name,
-                    booking_time=booking.booking_time,
-                    status=booking.status
-                )
-                participants.append(participant)
-            
             logger.debug(f"Retrieved {len(participants)} participants from API")
             return participants
             
@@ -99,6 +118,32 @@ class ParticipantRepository:
             logger.error(f"Error counting participants: {e}")
             raise
     
+    def get_event_name(self, event_id: str, default: str = "Event") -> Optional[str]:
+        """
+        Look up an event's name from a single booking.
+        Reads the name straight off the API response without building Participant rows.
+        
+        Args:
+            event_id: The event ID (UUID string)
+            default: Name to return when the booking carries no event name
+            
+        Returns:
+            The event name, or None if the event has no bookings
+        """
+        try:
+            bookings = self.booking_client.get_bookings_batch(
+                event_id=event_id,
+                offset=0,
+                batch_size=1
+            )
+            if not bookings:
+                return None
+            return bookings[0].event_name or default
+            
+        except Exception as e:
+            logger.error(f"Error fetching event name from API: {e}")
+            raise
+    
     def add_participant(
         self, 
         booking_id: str,
@@ -149,6 +194,11 @@ class ParticipantRepository:
     def add_participants_from_bookings(self, bookings: list) -> int:
         """
         Bulk add participants from booking data.
+        On PostgreSQL, imports above COPY_THRESHOLD rows are streamed with COPY.
+        Otherwise rows are inserted in chunks of BULK_INSERT_CHUNK_SIZE under one
+        commit. PostgreSQL and SQLite skip existing booking_ids in the INSERT
+        itself; on other databases a conflict falls back to per-row inserts so
+        the valid rows are still added.
         
         Args:
             bookings: List of booking dictionaries
@@ -156,30 +206,143 @@ class ParticipantRepository:
         Returns:
             Number of participants added
         """
-        count = 0
+        rows = []
+        missing = []
         for booking in bookings:
             try:
-                self.add_participant(
-                    booking_id=booking['booking_id'],
-                    event_id=booking['event_id'],
-                    user_id=booking['user_id'],
-                    user_email=booking['user_email'],
-                    event_name=booking.get('event_name'),
-                    booking_time=booking.get('booking_time'),
-                    status=booking.get('status', 'confirmed')
+                rows.append({
+                    'booking_id': booking['booking_id'],
+                    'event_id': booking['event_id'],
+                    'user_id': booking['user_id'],
+                    'user_email': booking['user_email'],
+                    'event_name': booking.get('event_name'),
+                    'booking_time': booking.get('booking_time'),
+                    'status': booking.get('status', 'confirmed')
+                })
+            except KeyError:
+                missing.append(booking.get('booking_id'))
+                
+        if missing:
+            logger.error(
+                "Skipped %d bookings missing required fields: %s",
+                len(missing), _preview(missing)
+            )
+            
+        if not rows:
+            return 0
+            
+        dialect_name = self.session.get_bind().dialect.name
+        if len(rows) > COPY_THRESHOLD and dialect_name == 'postgresql':
+            try:
+                return self.add_participants_bulk_copy(rows)
+            except Exception as e:
+                logger.warning(f"COPY import failed, falling back to bulk insert: {e}")
+                
+        if dialect_name in _INSERT_SKIP_EXISTING_STMTS:
+            return self.add_participants_skip_existing(rows)
+            
+        try:
+            for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+                self.session.bulk_insert_mappings(
+                    Participant, rows[start:start + BULK_INSERT_CHUNK_SIZE]
                 )
+            self.session.commit()
+            logger.info(f"Added {len(rows)} participants from bookings")
+            return len(rows)
+        except IntegrityError as e:
+            self.session.rollback()
+            logger.warning(f"Bulk insert conflicted, retrying bookings one by one: {e}")
+            
+        count = 0
+        for row in rows:
+            try:
+                self.add_participant(**row)
                 count += 1
             except Exception as e:
-                logger.error(f"Failed to add booking {booking.get('booking_id')}: {e}")
+                logger.error(f"Failed to add booking {row['booking_id']}: {e}")
                 continue
         
         logger.info(f"Added {count} participants from bookings")
         return count
     
+    def add_participants_skip_existing(self, rows: List[dict]) -> int:
+        """
+        Insert participant rows with ON CONFLICT (booking_id) DO NOTHING.
+        Bookings that already exist are skipped by the database and reported in
+        one warning, instead of a rollback and log line per conflicting row.
+        
+        Args:
+            rows: Participant mappings keyed by column name
+            
+        Returns:
+            Number of participants added
+            
+        Raises:
+            Exception: Any driver error; the session is rolled back first
+        """
+        stmt = _INSERT_SKIP_EXISTING_STMTS[self.session.get_bind().dialect.name]
+        inserted = set()
+        
+        try:
+            for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+                result = self.session.execute(stmt, rows[start:start + BULK_INSERT_CHUNK_SIZE])
+                inserted.update(result.scalars())
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+            
+        skipped = [row['booking_id'] for row in rows if row['booking_id'] not in inserted]
+        if skipped:
+            logger.warning(
+                "Skipped %d bookings that already exist: %s",
+                len(skipped), _preview(skipped)
+            )
+            
+        logger.info(f"Added {len(inserted)} participants from bookings")
+        return len(inserted)
+    
+    def add_participants_bulk_copy(self, rows: List[dict]) -> int:
+        """
+        Stream participant rows into PostgreSQL with COPY FROM STDIN.
+        Skips per-statement INSERT parsing, so very large imports run near wire speed.
+        
+        Args:
+            rows: Participant mappings keyed by column name
+            
+        Returns:
+            Number of participants added
+            
+        Raises:
+            Exception: Any driver error; the session is rolled back first
+        """
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in rows:
+            writer.writerow([row.get(column) for column in _COPY_COLUMNS])
+        buf.seek(0)
+        
+        try:
+            # Raw psycopg2 connection behind the session's current transaction
+            dbapi_conn = self.session.connection().connection
+            with dbapi_conn.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY participants ({', '.join(_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    buf
+                )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+            
+        logger.info(f"Copied {len(rows)} participants from bookings")
+        return len(rows)
+    
     def close(self):
         """Close the session if it's owned by this repository."""
-        if self._owns_session and self.session:
-            close_session(self.session)
+        if self._owns_session and self._session:
+            close_session(self._session)
+            self._session = None
     
     def __enter__(self):
         """Context manager entry."""
@@ -188,3 +351,11 @@ class ParticipantRepository:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
         self.close()
+
+
+def _preview(booking_ids: List[str]) -> str:
+    """Join the first few booking IDs for a log line, noting how many were left out."""
+    shown = ', '.join(str(booking_id) for booking_id in booking_ids[:_SKIPPED_IDS_LOGGED])
+    if len(booking_ids) > _SKIPPED_IDS_LOGGED:
+        shown += f" (+{len(booking_ids) - _SKIPPED_IDS_LOGGED} more)"
+    return shown
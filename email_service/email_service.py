@@ -3,18 +3,125 @@ Async email service for sending notifications.
 Supports both SMTP (for local dev) and HTTP API providers (for production).
 """
 import asyncio
+import json
+import random
 import aiosmtplib
+import httpx
 from abc import ABC, abstractmethod
 from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.utils import formataddr
 from typing import Optional
 from config.settings import settings
 import logging
-from email.message import EmailMessage
-from aiosmtplib import send
 
 logger = logging.getLogger(__name__)
 
+# orjson serializes request payloads several times faster than the stdlib
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+except ImportError:  # pragma: no cover
+    _json_dumps = json.dumps
+
+SENDGRID_API_URL = "https://api.sendgrid.com"
+
+# Upper bound on a single retry delay, in seconds
+MAX_RETRY_DELAY = 30
+
+# Batches at least this large stop early once a third of first attempts have failed
+EARLY_ABORT_MIN_BATCH = 30
+
+# Messages sent over one SMTP connection before it is replaced; many relays cap this
+MAX_MESSAGES_PER_CONNECTION = 100
+
+# One pooled client per process; sends are bounded by HTTP connections, not executor threads
+_sendgrid_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_sendgrid_client(api_key: str) -> httpx.AsyncClient:
+    """
+    Get the shared SendGrid HTTP client, creating it on first use.
+    
+    Args:
+        api_key: SendGrid API key sent as the bearer token
+        
+    Returns:
+        Shared httpx.AsyncClient
+    """
+    global _sendgrid_client
+    if _sendgrid_client is None or _sendgrid_client.is_closed:
+        _sendgrid_client = httpx.AsyncClient(
+            base_url=SENDGRID_API_URL,
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=30.0
+        )
+    return _sendgrid_client
+
+
+async def close_sendgrid_client():
+    """Close the shared SendGrid HTTP client, if one was opened."""
+    global _sendgrid_client
+    if _sendgrid_client is not None:
+        await _sendgrid_client.aclose()
+        _sendgrid_client = None
+        logger.debug("SendGrid HTTP client closed")
+
+
+class PermanentEmailError(Exception):
+    """A send failure that retrying cannot fix, such as a rejected API request."""
+
+
+class RateLimitedError(Exception):
+    """The provider asked us to slow down; retry_after is its requested wait in seconds, if given."""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Read a Retry-After header given in seconds; HTTP-date values are ignored."""
+    try:
+        return max(0.0, float(response.headers["Retry-After"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _is_permanent(error: Exception) -> bool:
+    """
+    Tell whether a failed send should not be retried.
+    SMTP 5xx replies to AUTH, MAIL FROM or RCPT TO are permanent, as is a
+    PermanentEmailError from an HTTP provider. Connection errors, timeouts
+    and 4xx replies may succeed on a later attempt.
+    
+    Args:
+        error: Exception raised by a provider send
+        
+    Returns:
+        True if the email should be given up on immediately
+    """
+    if isinstance(error, PermanentEmailError):
+        return True
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(refused.code >= 500 for refused in error.recipients)
+    if isinstance(error, (
+        aiosmtplib.SMTPAuthenticationError,
+        aiosmtplib.SMTPSenderRefused,
+        aiosmtplib.SMTPRecipientRefused
+    )):
+        return error.code >= 500
+    return False
+
+
+async def _quit(smtp: aiosmtplib.SMTP):
+    """Say QUIT on an SMTP connection, dropping it outright if that fails."""
+    try:
+        if smtp.is_connected:
+            await smtp.quit()
+    except Exception:
+        smtp.close()
+
 
 class EmailProvider(ABC):
     """Abstract base class for email providers."""
@@ -33,6 +140,25 @@ class EmailProvider(ABC):
     def get_provider_name(self) -> str:
         """Return the name of the provider for logging."""
         pass
+    
+    async def send_batch(self, emails: list[tuple[str, str, str]]) -> list:
+        """
+        Send several emails in one go.
+        
+        Args:
+            emails: List of tuples (to, subject, body)
+            
+        Returns:
+            One result per email: True, or the exception that email raised
+        """
+        return await asyncio.gather(
+            *(self.send_email(to, subject, body) for to, subject, body in emails),
+            return_exceptions=True
+        )
+    
+    async def close(self):
+        """Release any connections held by the provider."""
+        pass
 
 
 class DummyEmailProvider(EmailProvider):
@@ -55,6 +181,10 @@ class SMTPEmailProvider(EmailProvider):
     def __init__(self, config):
         """Initialize SMTP provider with configuration."""
         self.config = config
+        # Same for every message, so quoted once rather than per email
+        self._from_header = formataddr((config.from_name, config.from_email))
+        # Connections kept open between batches, with the messages each has sent
+        self._idle: list[tuple[aiosmtplib.SMTP, int]] = []
     
     async def send_email(self, to: str, subject: str, body: str) -> bool:
         """Send email via SMTP."""
@@ -67,36 +197,122 @@ class SMTPEmailProvider(EmailProvider):
             logger.error(f"SMTP error: {type(e).__name__}: {e}")
             raise
     
-    def _create_message(self, to: str, subject: str, body: str) -> MIMEMultipart:
-        """Create MIME email message."""
-        message = MIMEMultipart('alternative')
-        message['Subject'] = subject
-        message['From'] = f"{self.config.from_name} <{self.config.from_email}>"
-        message['To'] = to
+    async def send_batch(self, emails: list[tuple[str, str, str]]) -> list:
+        """
+        Send a batch over a small pool of persistent SMTP connections.
+        Each connection sends messages pulled from the shared batch until it is
+        drained. Connections are kept open afterwards, so later batches skip the
+        TCP/TLS/AUTH handshake; one is replaced after MAX_MESSAGES_PER_CONNECTION
+        messages or when the server drops it.
         
-        # Attach HTML body
-        html_part = MIMEText(body, 'html')
-        message.attach(html_part)
+        Args:
+            emails: List of tuples (to, subject, body)
+            
+        Returns:
+            One result per email: True, or the exception that email raised
+        """
+        results: list = [None] * len(emails)
+        pending = iter(range(len(emails)))
         
+        async def _drain():
+            smtp, sent = None, 0
+            try:
+                for i in pending:
+                    if smtp is None:
+                        smtp, sent = await self._acquire()
+                    to, subject, body = emails[i]
+                    try:
+                        await smtp.send_message(self._create_message(to, subject, body))
+                        results[i] = True
+                        sent += 1
+                    except Exception as e:
+                        logger.error(f"SMTP error sending to {to}: {type(e).__name__}: {e}")
+                        results[i] = e
+                    if sent >= MAX_MESSAGES_PER_CONNECTION or not smtp.is_connected:
+                        await self._release(smtp, sent)
+                        smtp = None
+            except Exception as e:
+                logger.error(f"SMTP connection error: {type(e).__name__}: {e}")
+            finally:
+                if smtp is not None:
+                    await self._release(smtp, sent)
+                
+        pool_size = max(1, min(self.config.smtp_pool_size, len(emails)))
+        await asyncio.gather(*(_drain() for _ in range(pool_size)))
+        
+        # Emails no connection got to count as failures
+        sent = sum(1 for r in results if r is True)
+        logger.info(f"SMTP batch sent {sent}/{len(emails)} emails over {pool_size} connection(s)")
+        return [
+            r if r is not None else ConnectionError("No SMTP connection available")
+            for r in results
+        ]
+    
+    async def _acquire(self) -> tuple[aiosmtplib.SMTP, int]:
+        """
+        Take an open connection from the idle pool, or connect a new one.
+        
+        Returns:
+            Tuple of (connected client, messages already sent over it)
+        """
+        loop = asyncio.get_running_loop()
+        while self._idle:
+            smtp, sent = self._idle.pop()
+            # Connections are bound to the loop that opened them
+            if smtp.is_connected and smtp.loop is loop:
+                return smtp, sent
+            smtp.close()
+            
+        smtp = aiosmtplib.SMTP(**self._connection_kwargs())
+        await smtp.connect()
+        return smtp, 0
+    
+    async def _release(self, smtp: aiosmtplib.SMTP, sent: int):
+        """Return a connection to the idle pool, or quit it if it is spent or the pool is full."""
+        if (
+            smtp.is_connected
+            and sent < MAX_MESSAGES_PER_CONNECTION
+            and len(self._idle) < self.config.smtp_pool_size
+        ):
+            self._idle.append((smtp, sent))
+        else:
+            await _quit(smtp)
+    
+    async def close(self):
+        """Quit every idle SMTP connection."""
+        idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            await _quit(smtp)
+    
+    def _create_message(self, to: str, subject: str, body: str) -> MIMEText:
+        """
+        Create MIME email message.
+        The HTML body is the whole message; there is no plain-text alternative,
+        so it is sent as a single text/html part rather than wrapped in a multipart.
+        """
+        message = MIMEText(body, 'html')
+        message['Subject'] = subject
+        message['From'] = self._from_header
+        message['To'] = to
         return message
     
-    async def _send_smtp(self, message: MIMEMultipart):
-        """Send email via SMTP."""
+    def _connection_kwargs(self) -> dict:
+        """Build aiosmtplib connection arguments from configuration."""
         # Determine security settings based on port
-        use_tls = self.config.smtp_port == 465
-        start_tls = self.config.smtp_port == 587
-        
+        return {
+            'hostname': self.config.smtp_host,
+            'port': self.config.smtp_port,
+            'username': self.config.smtp_username,
+            'password': self.config.smtp_password,
+            'use_tls': self.config.smtp_port == 465,
+            'start_tls': self.config.smtp_port == 587,
+            'timeout': 30
+        }
+    
+    async def _send_smtp(self, message: MIMEText):
+        """Send email via SMTP."""
         # Use send_message helper which handles connection automatically
-        await send(
-            message,
-            hostname=self.config.smtp_host,
-            port=self.config.smtp_port,
-            username=self.config.smtp_username,
-            password=self.config.smtp_password,
-            use_tls=use_tls,
-            start_tls=start_tls,
-            timeout=30
-        )
+        await aiosmtplib.send(message, **self._connection_kwargs())
     
     def get_provider_name(self) -> str:
         return f"SMTP ({self.config.smtp_host}:{self.config.smtp_port})"
@@ -109,62 +325,57 @@ class SendGridEmailProvider(EmailProvider):
         """Initialize SendGrid provider with configuration."""
         self.config = config
         
-        # Import SendGrid only when needed
-        try:
-            from sendgrid import SendGridAPIClient
-            from sendgrid.helpers.mail import Mail, Email, To, Content
-            self.SendGridAPIClient = SendGridAPIClient
-            self.Mail = Mail
-            self.Email = Email
-            self.To = To
-            self.Content = Content
-        except ImportError:
-            raise ImportError(
-                "SendGrid library not installed. "
-                "Install with: pip install sendgrid"
-            )
-        
         if not self.config.sendgrid_api_key:
             raise ValueError(
                 "SENDGRID_API_KEY environment variable is required "
                 "when using SendGrid provider"
             )
         
-        self.client = self.SendGridAPIClient(self.config.sendgrid_api_key)
+        self.client = _get_sendgrid_client(self.config.sendgrid_api_key)
     
     async def send_email(self, to: str, subject: str, body: str) -> bool:
         """Send email via SendGrid HTTP API."""
+        payload = {
+            "personalizations": [{"to": [{"email": to}]}],
+            "from": {
+                "email": self.config.from_email,
+                "name": self.config.from_name
+            },
+            "subject": subject,
+            "content": [{"type": "text/html", "value": body}]
+        }
+        
         try:
-            message = self.Mail(
-                from_email=self.Email(
-                    self.config.from_email, 
-                    self.config.from_name
-                ),
-                to_emails=self.To(to),
-                subject=subject,
-                html_content=self.Content("text/html", body)
-            )
-            
-            # SendGrid client is synchronous, run in executor to avoid blocking
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.send(message)
-            )
+            response = await self.client.post("/v3/mail/send", content=_json_dumps(payload))
             
             if response.status_code >= 200 and response.status_code < 300:
                 logger.info(f"Email sent successfully to {to} via SendGrid")
                 return True
             else:
                 logger.error(
-                    f"SendGrid API error: {response.status_code} - {response.body}"
+                    f"SendGrid API error: {response.status_code} - {response.text}"
                 )
+                if response.status_code == 429:
+                    raise RateLimitedError(
+                        "SendGrid rate limit exceeded", retry_after=_retry_after(response)
+                    )
+                # Other than rate limiting, 4xx means the request itself was rejected
+                if 400 <= response.status_code < 500:
+                    raise PermanentEmailError(f"SendGrid returned status {response.status_code}")
                 raise Exception(f"SendGrid returned status {response.status_code}")
                 
         except Exception as e:
             logger.error(f"SendGrid error: {type(e).__name__}: {e}")
             raise
     
+    async def close(self):
+        """
+        Release this provider.
+        
+        The HTTP client is shared with every other SendGrid provider in the
+        process, so it is left open; close_sendgrid_client() closes it at exit.
+        """
+    
     def get_provider_name(self) -> str:
         return "SendGrid (HTTP API)"
 
@@ -176,6 +387,7 @@ class EmailService:
         """Initialize email service with appropriate provider."""
         self.config = settings.email
         self.provider = self._create_provider()
+        self.max_concurrent = max(1, self.config.max_concurrent)
         
         logger.info(
             f"Email service initialized with provider: "
@@ -199,65 +411,84 @@ class EmailService:
                 f"Valid options: 'smtp', 'sendgrid'"
             )
     
+    async def close(self):
+        """Close the provider's pooled connections."""
+        await self.provider.close()
+    
     async def send_email(
         self, 
         to: str, 
         subject: str, 
         body: str,
-        retry_count: int = 0
+        first_attempt_failed: bool = False
     ) -> bool:
         """
-        Send an email asynchronously.
+        Send an email asynchronously, retrying with full-jitter exponential backoff.
+        Each delay is drawn uniformly from zero up to retry_delay * 2**attempt
+        (capped at MAX_RETRY_DELAY), so sends that failed together spread out
+        instead of retrying in lockstep. A rate limit with Retry-After waits
+        that long instead. Permanent failures are not retried.
         
         Args:
             to: Recipient email address
             subject: Email subject
             body: Email body (HTML supported)
-            retry_count: Current retry attempt (for internal use)
+            first_attempt_failed: The first attempt was already made elsewhere
+                (e.g. the provider's batch path); start with a backed-off retry
             
         Returns:
             True if email sent successfully, False otherwise
         """
-        try:
-            msg = EmailMessage()
-            msg["From"] = "nikhilvishnubonageri@gmail.com"
-            msg["To"] = to
-            msg["Subject"] = subject
-            msg.set_content(body, subtype='html')
-            #return await self.provider.send_email(to, subject, body)
-            await send(
-                msg,
-                hostname="smtp.gmail.com",
-                port=587,
-                start_tls=True,
-                username="nikhilvishnubonageri@gmail.com",
-                password="bgrzaxhfetifsuky",
-            )
-        except Exception as e:
-            logger.error(f"Failed to send email to {to}: {e}")
-            
-            # Retry logic
-            if retry_count < settings.processor.max_retries:
-                retry_count += 1
+        max_retries = settings.processor.max_retries
+        retry_after = None
+        for attempt in range(1 if first_attempt_failed else 0, max_retries + 1):
+            if attempt > 0:
+                if retry_after is not None:
+                    # Wait as long as the provider asked, plus a little spread
+                    delay = retry_after + random.uniform(0, 0.5)
+                else:
+                    delay = random.uniform(
+                        0, min(MAX_RETRY_DELAY, settings.processor.retry_delay * (2 ** (attempt - 1)))
+                    )
                 logger.info(
                     f"Retrying email to {to} "
-                    f"(attempt {retry_count}/{settings.processor.max_retries})"
+                    f"(attempt {attempt}/{max_retries})"
                 )
-                await asyncio.sleep(settings.processor.retry_delay)
-                return await self.send_email(to, subject, body, retry_count)
+                await asyncio.sleep(delay)
+                
+            retry_after = None
+            try:
+                return await self.provider.send_email(to, subject, body)
+            except RateLimitedError as e:
+                logger.warning(f"Rate limited sending email to {to}: {e}")
+                retry_after = e.retry_after
+            except Exception as e:
+                logger.error(f"Failed to send email to {to}: {e}")
+                if _is_permanent(e):
+                    return False
             
-            logger.error(
-                f"Failed to send email to {to} after "
-                f"{settings.processor.max_retries} retries"
-            )
-            return False
+        logger.error(
+            f"Failed to send email to {to} after "
+            f"{max_retries} retries"
+        )
+        return False
     
     async def send_batch(
         self, 
         emails: list[tuple[str, str, str]]
     ) -> tuple[int, int]:
         """
-        Send multiple emails concurrently.
+        Send multiple emails through the provider's batch path.
+        Emails are handed to the provider max_concurrent at a time, so a large
+        batch never has more than that many first attempts in flight. Emails
+        that fail there are retried individually with backoff, again at most
+        max_concurrent at a time, unless the failure was permanent.
+        
+        A batch of EARLY_ABORT_MIN_BATCH or more emails is abandoned once a
+        third of it has failed transiently on the first attempt: the provider
+        is most likely down, and the rest would only burn through their
+        retries. Permanent failures such as refused recipients do not count.
+        Emails left unsent and retries not yet finished count as failed.
         
         Args:
             emails: List of tuples (to, subject, body)
@@ -265,18 +496,57 @@ class EmailService:
         Returns:
             Tuple of (successful_count, failed_count)
         """
-        tasks = [
-            self.send_email(to, subject, body)
-            for to, subject, body in emails
-        ]
+        limit = asyncio.Semaphore(self.max_concurrent)
+        retries = []
+        successful = 0
+        first_failures = 0
+        abort_at = len(emails) // 3 if len(emails) >= EARLY_ABORT_MIN_BATCH else None
+        aborted = False
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for start in range(0, len(emails), self.max_concurrent):
+            chunk = emails[start:start + self.max_concurrent]
+            results = await self.provider.send_batch(chunk)
+            for email, result in zip(chunk, results):
+                if result is True:
+                    successful += 1
+                    continue
+                # Rejected recipients are bad addresses, not a failing provider
+                if not _is_permanent(result):
+                    first_failures += 1
+                    retries.append(asyncio.create_task(self._send_limited(limit, *email)))
+                    
+            if abort_at is not None and first_failures >= abort_at:
+                logger.error(
+                    "Aborting batch: %d of %d emails failed transiently, %d left unsent",
+                    first_failures, len(emails), len(emails) - start - len(chunk)
+                )
+                aborted = True
+                break
         
-        successful = sum(1 for r in results if r is True)
-        failed = len(results) - successful
+        if aborted:
+            for task in retries:
+                task.cancel()
+            settled = await asyncio.gather(*retries, return_exceptions=True)
+            successful += sum(1 for result in settled if result is True)
+        else:
+            # Tally retries as they finish instead of holding every result
+            for done in asyncio.as_completed(retries):
+                try:
+                    if await done is True:
+                        successful += 1
+                except Exception as e:
+                    logger.error(f"Retry task failed: {e}")
+                    
+        failed = len(emails) - successful
         
         logger.info(
             f"Batch email results: {successful} successful, {failed} failed"
         )
         
         return successful, failed
+
+    async def _send_limited(self, limit: asyncio.Semaphore, to: str, subject: str, body: str) -> bool:
+        """Retry one email from a batch once a slot in its concurrency limit is free."""
+        async with limit:
+            # The provider's batch path already made the first attempt
+            return await self.send_email(to, subject, body, first_attempt_failed=True)
@@ -2,7 +2,10 @@
 Unified entry point for the Notification Service.
 Runs both the FastAPI server and the background services (Queue Listener, Scheduler).
 """
+import asyncio
 import logging
+import logging.handlers
+import queue
 import threading
 import uvicorn
 import os
@@ -14,17 +17,29 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from api.main import app
 from data.database import init_database
 from scheduler.reminder_scheduler import start_reminder_scheduler, stop_reminder_scheduler
-from consumer.queue_listener import QueueListener
+from consumer.queue_listener import QueueListener, SHUTDOWN_DRAIN_TIMEOUT
 from config.settings import settings
 
-# Configure logging
+# Configure logging: callers only enqueue records, and a background thread
+# formats and writes them, so request and worker threads never block on I/O
+_log_formatter = logging.Formatter(settings.log_format)
+_log_handlers = [
+    logging.StreamHandler(sys.stdout),
+    logging.FileHandler('notification_service.log')
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(
+    _log_queue, *_log_handlers, respect_handler_level=True
+)
+log_listener.start()
+
 logging.basicConfig(
     level=getattr(logging, settings.log_level.upper()),
-    format=settings.log_format,
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('notification_service.log')
-    ]
+    format='%(message)s',  # Final formatting happens in the listener's handlers
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 
 logger = logging.getLogger(__name__)
@@ -49,9 +64,10 @@ async def startup_services():
         logger.info("Starting reminder scheduler...")
         scheduler = start_reminder_scheduler()
         
-        # Start queue listener in a separate thread
+        # Messages are processed on the API's event loop; only the blocking
+        # AMQP connection needs its own thread
         logger.info("Starting queue listener...")
-        listener = QueueListener()
+        listener = QueueListener(loop=asyncio.get_running_loop())
         listener_thread = threading.Thread(target=listener.start, daemon=True)
         listener_thread.start()
         logger.info("Queue listener started in background thread")
@@ -61,7 +77,6 @@ async def startup_services():
         # We might want to exit here if services are critical
         sys.exit(1)
 
-@app.on_event("shutdown")
 async def shutdown_services():
     """Stop background services when API stops."""
     global scheduler, listener
@@ -75,9 +90,20 @@ async def shutdown_services():
         logger.info("Stopping queue listener...")
         listener.stop()
         if listener_thread and listener_thread.is_alive():
-            listener_thread.join(timeout=5.0)
+            # Join off the loop so in-flight notifications can still finish;
+            # the listener settles them before closing its connection
+            await asyncio.to_thread(listener_thread.join, SHUTDOWN_DRAIN_TIMEOUT + 5.0)
             logger.info("Queue listener thread stopped")
 
+# Runs before the API's own shutdown hook: in-flight deliveries must drain
+# while the shared booking and SendGrid clients it closes are still open
+app.router.on_shutdown.insert(0, shutdown_services)
+
+@app.on_event("shutdown")
+async def flush_logs():
+    """Flush queued log records to their handlers once everything else has stopped."""
+    log_listener.stop()
+
 if __name__ == "__main__":
     # Run the server
     # We use "main:app" because this file is named main.py
@@ -1,16 +1,50 @@
 """
 Data Transfer Objects for the notification service.
 """
-from dataclasses import dataclass
-from typing import Literal, Optional
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Literal, NamedTuple, Optional, Union, get_args
 from datetime import datetime
 import json
 
+# orjson decodes message bodies (str or bytes) several times faster than the stdlib
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
+
 
 EventType = Literal['event_updated', 'event_update', 'event_created', 'event_cancelled', 'event_reminder']
+_VALID_EVENT_TYPES: frozenset = frozenset(get_args(EventType))
+
+
+@lru_cache(maxsize=1024)
+def _format_iso(value: str, fmt: str) -> str:
+    """
+    Format an ISO-8601 timestamp, memoized per (value, format).
+    Every recipient of an event renders the same timestamps, so each is parsed once.
+    
+    Args:
+        value: ISO-8601 timestamp, optionally with a trailing 'Z'
+        fmt: strftime format string
+        
+    Returns:
+        The formatted timestamp, or the raw value if it cannot be parsed
+    """
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return dt.strftime(fmt)
+    except (AttributeError, TypeError, ValueError):
+        return value
+
+
+def _display_name(email: str) -> str:
+    """Derive a participant's display name from their email address."""
+    return email.split('@', 1)[0] if email else 'User'
 
 
-@dataclass
+@dataclass(slots=True)
 class BookingBatchResponse:
     """Booking data from the booking service API."""
     booking_id: str
@@ -20,6 +54,11 @@ class BookingBatchResponse:
     event_name: Optional[str] = None
     booking_time: Optional[str] = None
     status: str = 'confirmed'
+    # Display name derived from the email once, not on every template render
+    name: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.name = _display_name(self.user_email)
     
     @classmethod
     def from_dict(cls, data: dict) -> 'BookingBatchResponse':
@@ -38,15 +77,21 @@ class BookingBatchResponse:
     def email(self):
         """Alias for user_email for backward compatibility."""
         return self.user_email
-    
-    @property
-    def name(self):
-        """Extract name from email for backward compatibility."""
-        return self.user_email.split('@')[0] if self.user_email else 'User'
 
 
+class BookingContact(NamedTuple):
+    """Just the booking fields needed to email a participant."""
+    email: str
+    name: str
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BookingContact':
+        """Create BookingContact from a booking dictionary."""
+        email = data['user_email']
+        return cls(email, _display_name(email))
+
 
-@dataclass
+@dataclass(slots=True)
 class Event:
     """Event details from the message."""
     event_id: str
@@ -76,34 +121,26 @@ class Event:
     
     def get_formatted_start_time(self) -> str:
         """Get formatted start time."""
-        try:
-            dt = datetime.fromisoformat(self.start_time.replace('Z', '+00:00'))
-            return dt.strftime('%B %d, %Y at %I:%M %p')
-        except:
-            return self.start_time
+        return _format_iso(self.start_time, '%B %d, %Y at %I:%M %p')
     
     def get_formatted_end_time(self) -> str:
         """Get formatted end time."""
-        try:
-            dt = datetime.fromisoformat(self.end_time.replace('Z', '+00:00'))
-            return dt.strftime('%I:%M %p')
-        except:
-            return self.end_time
+        return _format_iso(self.end_time, '%I:%M %p')
 
 
-@dataclass
+@dataclass(slots=True)
 class NotificationMessage:
     """DTO for notification messages from the queue."""
     type: EventType
     event: Event
     
     @classmethod
-    def from_json(cls, json_str: str) -> 'NotificationMessage':
+    def from_json(cls, json_str: Union[str, bytes]) -> 'NotificationMessage':
         """
         Deserialize JSON string into NotificationMessage.
         
         Args:
-            json_str: JSON string containing type and event
+            json_str: JSON string (or raw bytes) containing type and event
             
         Returns:
             NotificationMessage instance
@@ -112,17 +149,34 @@ class NotificationMessage:
             ValueError: If JSON is invalid or missing required fields
         """
         try:
-            data = json.loads(json_str)
+            data = _json_loads(json_str)
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON: {e}")
         
+        return cls.from_dict(data)
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'NotificationMessage':
+        """
+        Build NotificationMessage from an already-decoded message.
+        
+        Args:
+            data: Dictionary containing type and event
+            
+        Returns:
+            NotificationMessage instance
+            
+        Raises:
+            ValueError: If required fields are missing or invalid
+        """
         if 'type' not in data:
             raise ValueError("Missing required field: 'type'")
         if 'event' not in data:
             raise ValueError("Missing required field: 'event'")
         
         event_type = data['type']
-        if event_type not in ['event_updated', 'event_update', 'event_created', 'event_cancelled', 'event_reminder']:
+        # Check the type first: an unhashable value would make the set lookup raise TypeError
+        if not isinstance(event_type, str) or event_type not in _VALID_EVENT_TYPES:
             raise ValueError(f"Invalid event type: {event_type}")
         
         try:
@@ -2,13 +2,22 @@
 Notification processor for handling event notification messages.
 """
 import asyncio
+import threading
+from typing import Dict, Optional
 from models.dto import NotificationMessage
-from data.repository import ParticipantRepository
+from api.booking_client import AsyncBookingAPIClient
 from email_service.email_service import EmailService
 from templates.email_templates import EmailTemplateLoader
 from config.settings import settings
 import logging
 
+# uvloop runs asyncio I/O several times faster than the stdlib event loop
+try:
+    import uvloop
+    new_event_loop = uvloop.new_event_loop
+except ImportError:  # pragma: no cover
+    new_event_loop = asyncio.new_event_loop
+
 logger = logging.getLogger(__name__)
 
 class NotificationProcessor:
@@ -18,10 +27,27 @@ class NotificationProcessor:
         """Initialize notification processor."""
         self.email_service = EmailService()
         self.batch_size = settings.processor.batch_size
+        self.max_parallel_batches = max(1, settings.processor.max_parallel_batches)
+        self._booking_client: Optional[AsyncBookingAPIClient] = None
         logger.info(
-            f"NotificationProcessor initialized with batch_size={self.batch_size}"
+            "NotificationProcessor initialized with batch_size=%d, max_parallel_batches=%d",
+            self.batch_size, self.max_parallel_batches
         )
     
+    @property
+    def booking_client(self) -> AsyncBookingAPIClient:
+        """Booking API client shared by every message, created on first use."""
+        if self._booking_client is None:
+            self._booking_client = AsyncBookingAPIClient()
+        return self._booking_client
+    
+    async def close(self):
+        """Close the booking API client and the email provider's pooled connections."""
+        if self._booking_client is not None:
+            await self._booking_client.close()
+            self._booking_client = None
+        await self.email_service.close()
+    
     async def process(self, message: NotificationMessage):
         """
         Process a notification message.
@@ -29,145 +55,192 @@ class NotificationProcessor:
         Steps:
         1. Extract type and event from message
         2. Load email template by type
-        3. Fetch participants from database in batches
-        4. Send email to all participants until all processed
+        3. Fetch participants from the booking service in prefetched batches
+        4. Send email to all participants, several batches at a time
         
         Args:
             message: NotificationMessage DTO
+            
+        Raises:
+            Exception: The first error from a batch that could not be sent
         """
-        logger.info(f"Processing message: {message}")
+        logger.info("Processing message: %s", message)
         
         # Step 1: Extract type and event
         event_type = message.type
         event = message.event
         
         logger.info(
-            f"Step 1: Extracted event_type={event_type}, "
-            f"event_id={event.event_id}, event_name={event.event_name}"
+            "Step 1: Extracted event_type=%s, event_id=%s, event_name=%s",
+            event_type, event.event_id, event.event_name
         )
         
-        # Step 2: Load email template by type
+        # Step 2: Load email template by type, rendered once for this event
         try:
-            template = EmailTemplateLoader.get_template(event_type)
-            logger.info(f"Step 2: Loaded template for event_type={event_type}")
+            prepared = EmailTemplateLoader.prepare_template(event_type, event)
+            logger.info("Step 2: Loaded template for event_type=%s", event_type)
         except ValueError as e:
-            logger.error(f"Failed to load template: {e}")
+            logger.error("Failed to load template: %s", e)
             return
         
-        # Step 3 & 4: Fetch participants in batches and send emails
-        with ParticipantRepository() as repo:
-            # Get total count for logging
-            # Note: Using event_id as string now (UUID format)
-            total_participants = repo.count_participants_by_event(event.event_id)
-            logger.info(
-                f"Step 3: Total participants to process: {total_participants}"
-            )
-            
-            if total_participants == 0:
-                logger.warning(
-                    f"No participants found for event_id={event.event_id}"
-                )
-                return
-            
-            offset = 0
-            batch_number = 1
-            total_sent = 0
-            total_failed = 0
-            
-            while True:
-                # Fetch batch of participants
-                participants = repo.get_participants_by_event(
-                    event_id=event.event_id,
-                    offset=offset,
-                    limit=self.batch_size
-                )
-                
-                if not participants:
-                    logger.info("No more participants to process")
-                    break
-                
+        # Step 3 & 4: Fetch participants in batches and send emails; totals are
+        # counted as batches go rather than with a separate count request
+        batch_number = 1
+        total_sent = 0
+        total_failed = 0
+        
+        # Up to max_parallel_batches batches are emailed at once; fetching
+        # pauses while that many are in flight
+        limit = asyncio.Semaphore(self.max_parallel_batches)
+        sending = []
+        
+        try:
+            # The next pages download while earlier batches are being emailed
+            async for participants in self.booking_client.prefetch_contacts(
+                event_id=event.event_id,
+                batch_size=self.batch_size
+            ):
                 logger.info(
-                    f"Step 4: Processing batch {batch_number} "
-                    f"({len(participants)} participants, offset={offset})"
+                    "Step 4: Processing batch %d (%d participants)",
+                    batch_number, len(participants)
                 )
                 
-                # Send emails for this batch
-                sent, failed = await self._send_batch_emails(
+                await limit.acquire()
+                task = asyncio.create_task(self._send_batch_emails(
                     participants=participants,
                     event_type=event_type,
                     event=event,
-                    batch_number=batch_number
-                )
-                
-                total_sent += sent
-                total_failed += failed
-                
-                # Move to next batch
-                offset += self.batch_size
+                    batch_number=batch_number,
+                    prepared=prepared
+                ))
+                task.add_done_callback(lambda _: limit.release())
+                sending.append(task)
                 batch_number += 1
+        finally:
+            # Batches already handed off finish even if a later page fails to load
+            results = await asyncio.gather(*sending, return_exceptions=True)
+            
+        if not sending:
+            logger.warning("No participants found for event_id=%s", event.event_id)
+            return
             
-            # Final summary
-            logger.info(
-                f"Processing complete for event_id={event.event_id}: "
-                f"{total_sent} emails sent successfully, "
-                f"{total_failed} failed out of {total_participants} total"
-            )
+        errors = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error("Batch send failed: %s", result)
+                errors.append(result)
+                continue
+            sent, failed = result
+            total_sent += sent
+            total_failed += failed
+        
+        # Final summary
+        logger.info(
+            "Processing complete for event_id=%s: %d emails sent successfully, "
+            "%d failed, %d processed",
+            event.event_id, total_sent, total_failed, total_sent + total_failed
+        )
+        
+        # A lost batch must fail the message so it is requeued rather than acked
+        if errors:
+            raise errors[0]
     
     async def _send_batch_emails(
         self,
         participants: list,
         event_type: str,
         event,  # Event object
-        batch_number: int
+        batch_number: int,
+        prepared: Optional[Dict[str, str]] = None
     ) -> tuple[int, int]:
         """
         Send emails to a batch of participants.
         
         Args:
-            participants: List of Participant objects
+            participants: List of contacts (e.g. BookingContact) exposing name and email
             event_type: Type of event
             event: Event object with all details
             batch_number: Current batch number (for logging)
+            prepared: Template from EmailTemplateLoader.prepare_template(); built here if omitted
             
         Returns:
             Tuple of (successful_count, failed_count)
         """
-        logger.info(f"Sending emails for batch {batch_number}...")
-        
-        # Prepare email data for all participants
-        email_tasks = []
-        for participant in participants:
-            # Render template for this participant
-            rendered = EmailTemplateLoader.render_template(
-                event_type=event_type,
-                event=event,
-                name=participant.name
-            )
+        if prepared is None:
+            prepared = EmailTemplateLoader.prepare_template(event_type, event)
             
-            email_tasks.append((
-                participant.email,
-                rendered['subject'],
-                rendered['body']
-            ))
+        # Only the body differs between participants; render them in one pass
+        bodies = EmailTemplateLoader.personalize_batch(
+            prepared, [participant.name for participant in participants]
+        )
+        subject = prepared['subject']
+        email_tasks = [
+            (participant.email, subject, body)
+            for participant, body in zip(participants, bodies)
+        ]
         
         # Send all emails in this batch concurrently
         successful, failed = await self.email_service.send_batch(email_tasks)
         
         logger.info(
-            f"Batch {batch_number} complete: "
-            f"{successful} sent, {failed} failed"
+            "Batch %d complete: %d sent, %d failed",
+            batch_number, successful, failed
         )
         
         return successful, failed
 
 
+# Shared processor instance, created lazily by get_notification_processor()
+_processor: Optional[NotificationProcessor] = None
+_processor_lock = threading.Lock()
+
+
+def get_notification_processor() -> NotificationProcessor:
+    """
+    Get the process-wide NotificationProcessor.
+    
+    Reusing one processor keeps its email provider and template state alive
+    between messages instead of rebuilding them per notification.
+    
+    Returns:
+        Shared NotificationProcessor instance
+    """
+    global _processor
+    if _processor is None:
+        with _processor_lock:
+            if _processor is None:
+                _processor = NotificationProcessor()
+    return _processor
+
+
+async def close_notification_processor():
+    """Close the shared processor's connections, if one was created."""
+    global _processor
+    if _processor is not None:
+        await _processor.close()
+        _processor = None
+        logger.debug("Shared NotificationProcessor closed")
+
+
+# Event loop reused by process_message_sync(); runs one message at a time
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
 def process_message_sync(message: NotificationMessage):
     """
     Synchronous wrapper for processing messages.
     This is called by the queue listener.
     
+    Messages run on one long-lived event loop instead of a new loop per
+    asyncio.run call; the lock keeps callers from different threads from
+    driving it at the same time.
+    
     Args:
         message: NotificationMessage DTO
     """
-    processor = NotificationProcessor()
-    asyncio.run(processor.process(message))
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None or _sync_loop.is_closed():
+            _sync_loop = new_event_loop()
+        _sync_loop.run_until_complete(get_notification_processor().process(message))
@@ -4,10 +4,45 @@ Queue publisher for sending reminder messages to LavinMQ.
 import pika
 import json
 import logging
+from functools import lru_cache
+from typing import List, Tuple
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Every reminder is published with the same properties, so build them once
+_REMINDER_PROPERTIES = pika.BasicProperties(
+    delivery_mode=2,  # Make message persistent
+    content_type='application/json'
+)
+
+
+@lru_cache(maxsize=None)
+def _reminder_body_parts(reminder_type: str) -> Tuple[bytes, bytes]:
+    """
+    Serialize a reminder message once per reminder type, split around the event ID.
+    
+    Args:
+        reminder_type: Type of reminder ('one_day' or 'one_hour')
+        
+    Returns:
+        (prefix, suffix) such that prefix + json(event_id) + suffix is the message
+    """
+    body = json.dumps({
+        "type": "event_reminder",
+        "event_id": None,
+        "reminder_type": reminder_type
+    }).encode()
+    prefix, suffix = body.split(b"null", 1)
+    return prefix, suffix
+
+
+def _reminder_body(event_id, reminder_type: str) -> bytes:
+    """Build the JSON body of a reminder message from the cached serialization."""
+    prefix, suffix = _reminder_body_parts(reminder_type)
+    # Convert event_id to string to handle UUID objects
+    return prefix + json.dumps(str(event_id)).encode() + suffix
+
 
 class QueuePublisher:
     """Publisher for sending messages to LavinMQ queue."""
@@ -18,6 +53,14 @@ class QueuePublisher:
         self.connection = None
         self.channel = None
     
+    @property
+    def is_connected(self) -> bool:
+        """True if the publisher holds an open connection and channel."""
+        return bool(
+            self.connection and self.connection.is_open
+            and self.channel and self.channel.is_open
+        )
+    
     def connect(self):
         """Establish connection to LavinMQ."""
         try:
@@ -44,6 +87,9 @@ class QueuePublisher:
                 durable=True
             )
             
+            # Publishes are committed in batches; the broker is waited on once per tx_commit
+            self.channel.tx_select()
+            
             logger.debug(f"Connected to LavinMQ at {self.config.host}:{self.config.port}")
             
         except Exception as e:
@@ -61,41 +107,59 @@ class QueuePublisher:
         Returns:
             True if published successfully
         """
+        return self.publish_reminders([event_id], reminder_type)
+    
+    def publish_reminders(self, event_ids: List[str], reminder_type: str) -> bool:
+        """
+        Publish one reminder message per event and commit them together.
+        The messages are written back to back and the broker is waited on
+        once, at tx_commit, so either all of them are queued or none are.
+        
+        Args:
+            event_ids: Event IDs (UUIDs)
+            reminder_type: Type of reminder ('one_day' or 'one_hour')
+            
+        Returns:
+            True if every message was committed to the queue
+        """
+        if not event_ids:
+            return True
+            
         try:
             # Ensure connection
-            if not self.connection or self.connection.is_closed:
+            if not self.is_connected:
                 self.connect()
             
-            # Create message - convert event_id to string to handle UUID objects
-            message = {
-                "type": "event_reminder",
-                "event_id": str(event_id),  # Convert to string for JSON serialization
-                "reminder_type": reminder_type
-            }
-            
-            # Publish to queue
-            self.channel.basic_publish(
-                exchange='',
-                routing_key=self.config.queue_name,
-                body=json.dumps(message),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # Make message persistent
-                    content_type='application/json'
+            for event_id in event_ids:
+                self.channel.basic_publish(
+                    exchange='',
+                    routing_key=self.config.queue_name,
+                    body=_reminder_body(event_id, reminder_type),
+                    properties=_REMINDER_PROPERTIES
                 )
-            )
+            
+            self.channel.tx_commit()
             
             logger.info(
-                f"Published reminder: event_id={event_id}, "
-                f"type={reminder_type}"
+                f"Published {len(event_ids)} reminders: type={reminder_type}"
             )
             return True
             
         except Exception as e:
             logger.error(
-                f"Failed to publish reminder for event {event_id}: {e}"
+                f"Failed to publish {len(event_ids)} {reminder_type} reminders: {e}"
             )
+            self._rollback()
             return False
     
+    def _rollback(self):
+        """Discard uncommitted publishes, if the channel is still usable."""
+        try:
+            if self.channel and self.channel.is_open:
+                self.channel.tx_rollback()
+        except Exception as e:
+            logger.debug(f"Could not roll back publish transaction: {e}")
+    
     def close(self):
         """Close connection to LavinMQ."""
         try:
@@ -106,6 +170,9 @@ class QueuePublisher:
             logger.debug("Queue publisher connection closed")
         except Exception as e:
             logger.error(f"Error closing queue publisher: {e}")
+        finally:
+            self.connection = None
+            self.channel = None
     
     def __enter__(self):
         """Context manager entry."""
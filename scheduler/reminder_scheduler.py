@@ -1,7 +1,10 @@
 """
 Scheduler for checking and sending event reminders.
 """
-from apscheduler.schedulers.background import BackgroundScheduler
+import atexit
+import threading
+import time
+from typing import Optional
 from data.reminder_repository import ReminderRepository
 from scheduler.queue_publisher import QueuePublisher
 import logging
@@ -9,10 +12,104 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Maximum reminders claimed per round-trip
+CLAIM_BATCH_SIZE = 100
+
+# Publisher kept connected across scheduler ticks, created by _get_publisher()
+_publisher: Optional[QueuePublisher] = None
+
+
+def _get_publisher() -> QueuePublisher:
+    """
+    Get the scheduler's long-lived publisher, (re)connecting it if needed.
+    
+    Returns:
+        Connected QueuePublisher
+    """
+    global _publisher
+    if _publisher is None:
+        _publisher = QueuePublisher()
+        
+    if _publisher.is_connected:
+        try:
+            # Service heartbeats and broker frames that arrived while idle
+            _publisher.connection.process_data_events(time_limit=0)
+        except Exception as e:
+            logger.warning("Reminder publisher connection lost, reconnecting: %s", e)
+            _publisher.close()
+            
+    if not _publisher.is_connected:
+        _publisher.connect()
+    return _publisher
+
+
+def _close_publisher():
+    """Close the scheduler's publisher, if one was opened."""
+    global _publisher
+    if _publisher is not None:
+        _publisher.close()
+        _publisher = None
+
+
+atexit.register(_close_publisher)
+
+
+def _send_reminders(claim, confirm, release, reminder_type: str) -> int:
+    """
+    Claim due reminders in batches and mark each batch sent once it is published.
+    
+    Args:
+        claim: Repository method that claims due reminders without committing
+        confirm: Repository method that commits the open claim
+        release: Repository method that rolls back the open claim
+        reminder_type: Type of reminder ('one_day' or 'one_hour')
+        
+    Returns:
+        Number of reminders published
+    """
+    label = reminder_type.replace('_', '-')
+    sent_count = 0
+    
+    while True:
+        reminders = claim(limit=CLAIM_BATCH_SIZE)
+        if not reminders:
+            # Commit the empty claim so the repository can cache the next due time
+            confirm()
+            break
+            
+        logger.info("Claimed %d pending %s reminders", len(reminders), label)
+        published = False
+        try:
+            # One broker commit for the whole claimed batch
+            publisher = _get_publisher()
+            event_ids = [reminder.event_id for reminder in reminders]
+            published = publisher.publish_reminders(event_ids, reminder_type)
+            if not published and not publisher.is_connected:
+                # The broker dropped the connection mid-batch; reconnect and retry once
+                published = publisher.publish_reminders(event_ids, reminder_type)
+        finally:
+            # Reminders are only recorded as sent once the broker has them
+            if published:
+                confirm()
+            else:
+                release()
+                
+        if not published:
+            logger.error("Failed to publish %d %s reminders", len(reminders), label)
+            break
+            
+        sent_count += len(reminders)
+        logger.info("Sent %d %s reminders", len(reminders), label)
+        if len(reminders) < CLAIM_BATCH_SIZE:
+            break
+            
+    return sent_count
+
+
 def check_reminders():
     """
     Check for pending reminders and publish messages to queue.
-    This function runs every minute via APScheduler.
+    This function runs every minute via the reminder scheduler.
     """
     logger.info("Checking for pending event reminders...")
     
@@ -21,94 +118,113 @@ def check_reminders():
     
     try:
         with ReminderRepository() as repo:
+            # Idle ticks stop here, before any claim or broker traffic
+            if not repo.any_pending():
+                logger.debug("No pending reminders found")
+                return
+                
             # Check one-day reminders
-            one_day_reminders = repo.get_pending_one_day_reminders()
-            
-            if one_day_reminders:
-                logger.info(f"Found {len(one_day_reminders)} pending one-day reminders")
+            one_day_count = _send_reminders(
+                repo.claim_pending_one_day,
+                repo.confirm_claimed,
+                repo.release_claimed,
+                'one_day'
+            )
                 
-                with QueuePublisher() as publisher:
-                    for reminder in one_day_reminders:
-                        try:
-                            # Publish message
-                            success = publisher.publish_reminder(
-                                event_id=reminder.event_id,
-                                reminder_type='one_day'
-                            )
-                            
-                            if success:
-                                # Mark as sent
-                                repo.mark_one_day_sent(reminder.id)
-                                one_day_count += 1
-                                logger.info(
-                                    f"Sent one-day reminder for event {reminder.event_id}"
-                                )
-                        except Exception as e:
-                            logger.error(
-                                f"Failed to process one-day reminder {reminder.id}: {e}"
-                            )
-                            continue
-            
             # Check one-hour reminders
-            one_hour_reminders = repo.get_pending_one_hour_reminders()
-            
-            if one_hour_reminders:
-                logger.info(f"Found {len(one_hour_reminders)} pending one-hour reminders")
-                
-                with QueuePublisher() as publisher:
-                    for reminder in one_hour_reminders:
-                        try:
-                            # Publish message
-                            success = publisher.publish_reminder(
-                                event_id=reminder.event_id,
-                                reminder_type='one_hour'
-                            )
-                            
-                            if success:
-                                # Mark as sent
-                                repo.mark_one_hour_sent(reminder.id)
-                                one_hour_count += 1
-                                logger.info(
-                                    f"Sent one-hour reminder for event {reminder.event_id}"
-                                )
-                        except Exception as e:
-                            logger.error(
-                                f"Failed to process one-hour reminder {reminder.id}: {e}"
-                            )
-                            continue
+            one_hour_count = _send_reminders(
+                repo.claim_pending_one_hour,
+                repo.confirm_claimed,
+                repo.release_claimed,
+                'one_hour'
+            )
         
         if one_day_count > 0 or one_hour_count > 0:
             logger.info(
-                f"Reminder check complete: {one_day_count} one-day, "
-                f"{one_hour_count} one-hour reminders sent"
+                "Reminder check complete: %d one-day, %d one-hour reminders sent",
+                one_day_count, one_hour_count
             )
         else:
             logger.debug("No pending reminders found")
             
     except Exception as e:
-        logger.error(f"Error in reminder check job: {e}")
+        logger.error("Error in reminder check job: %s", e)
+
+
+# Cron expression for "every minute", served without APScheduler
+EVERY_MINUTE = '* * * * *'
+
+
+class MinuteScheduler(threading.Thread):
+    """Daemon thread that runs a job at the start of every minute."""
+    
+    def __init__(self, job):
+        """
+        Initialize the scheduler thread.
+        
+        Args:
+            job: Callable run once per minute
+        """
+        super().__init__(name="reminder-scheduler", daemon=True)
+        self._job = job
+        self._stopped = threading.Event()
+    
+    @property
+    def running(self) -> bool:
+        """True while the thread is alive and has not been asked to stop."""
+        return self.is_alive() and not self._stopped.is_set()
+    
+    def run(self):
+        """Sleep until the next minute boundary, run the job, repeat until shut down."""
+        while not self._stopped.wait(60 - time.time() % 60):
+            try:
+                self._job()
+            except Exception:
+                logger.exception("Scheduled job failed")
+    
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the scheduler.
+        
+        Args:
+            wait: Block until a job that is running has finished
+        """
+        self._stopped.set()
+        if wait and self.is_alive():
+            self.join()
 
 
 def start_reminder_scheduler():
     """
     Start the background scheduler for reminder checks.
     
+    The default every-minute schedule runs on a plain MinuteScheduler thread;
+    APScheduler is only imported for other cron expressions.
+    
     Returns:
-        BackgroundScheduler instance
+        MinuteScheduler or BackgroundScheduler instance
     """
     from config.settings import settings
     
     logger.info("Starting reminder scheduler...")
     
-    scheduler = BackgroundScheduler()
-    
     cron_expression = settings.scheduler.cron_expression
     
     # Parse cron expression (minute hour day month day_of_week)
     cron_parts = cron_expression.split()
     if len(cron_parts) != 5:
-        logger.error(f"Invalid cron expression: {cron_expression}. Using default: every minute")
-        cron_parts = ['*', '*', '*', '*', '*']
+        logger.error("Invalid cron expression: %s. Using default: every minute", cron_expression)
+        cron_parts = EVERY_MINUTE.split()
+    
+    if cron_parts == EVERY_MINUTE.split():
+        scheduler = MinuteScheduler(check_reminders)
+        scheduler.start()
+        logger.info("Reminder scheduler started: every minute")
+        return scheduler
+    
+    from apscheduler.schedulers.background import BackgroundScheduler
+    
+    scheduler = BackgroundScheduler()
     
     # Add job with cron trigger
     scheduler.add_job(
@@ -125,18 +241,19 @@ def start_reminder_scheduler():
     )
     
     scheduler.start()
-    logger.info(f"Reminder scheduler started with cron: {cron_expression}")
+    logger.info("Reminder scheduler started with cron: %s", cron_expression)
     
     return scheduler
 
 
-def stop_reminder_scheduler(scheduler: BackgroundScheduler):
+def stop_reminder_scheduler(scheduler):
     """
     Stop the reminder scheduler gracefully.
     
     Args:
-        scheduler: BackgroundScheduler instance
+        scheduler: Scheduler returned by start_reminder_scheduler()
     """
     if scheduler and scheduler.running:
         scheduler.shutdown(wait=True)
         logger.info("Reminder scheduler stopped")
+    _close_publisher()
@@ -2,6 +2,17 @@ import pika
 import json
 from config.settings import settings
 
+# The test message never changes, so it is encoded once
+MESSAGE = {
+    "type": "event_reminder",
+    "event_id": "123",
+    "reminder_type": "one_day"
+}
+MESSAGE_BODY = json.dumps(MESSAGE).encode()
+MESSAGE_PROPERTIES = pika.BasicProperties(
+    delivery_mode=2,  # make message persistent
+)
+
 def send_test_message():
     print("Connecting to LavinMQ...")
     if hasattr(settings.lavinmq, 'connection_url') and settings.lavinmq.connection_url:
@@ -21,21 +32,13 @@ def send_test_message():
     queue_name = settings.lavinmq.queue_name
     channel.queue_declare(queue=queue_name, durable=True)
     
-    message = {
-        "type": "event_reminder",
-        "event_id": "123",
-        "reminder_type": "one_day"
-    }
-    
-    print(f"Sending message to {queue_name}: {message}")
+    print(f"Sending message to {queue_name}: {MESSAGE}")
     
     channel.basic_publish(
         exchange='',
         routing_key=queue_name,
-        body=json.dumps(message),
-        properties=pika.BasicProperties(
-            delivery_mode=2,  # make message persistent
-        )
+        body=MESSAGE_BODY,
+        properties=MESSAGE_PROPERTIES
     )
     
     print("Message sent!")
@@ -1,9 +1,9 @@
 import uuid
 from datetime import datetime, timedelta, timezone
-from data.database import init_database, get_session, get_notification_session
+from data.database import init_database, get_notification_session
 from data.repository import ParticipantRepository
 from data.reminder_model import EventReminder
-from sqlalchemy.orm import Session
+from sqlalchemy import update
 
 def setup_test_data():
     print("Initializing database...")
@@ -13,19 +13,20 @@ def setup_test_data():
     
     # 1. Add Participant
     print("Adding test participant...")
+    user_email = "test_participant@example.com"
     with ParticipantRepository() as repo:
-        # Check if participant already exists to avoid duplicates
-        participants = repo.get_participants_by_event(event_id)
-        if not participants:
-            repo.add_participant(
-                booking_id=str(uuid.uuid4()),
-                event_id=event_id,
-                user_id=str(uuid.uuid4()),
-                user_email="test_participant@example.com",
-                event_name="Test Event",
-                booking_time=datetime.now().isoformat(),
-                status="confirmed"
-            )
+        # A booking_id derived from the event and email makes re-runs hit the
+        # unique constraint, so existing participants are skipped by the INSERT
+        added = repo.add_participants_from_bookings([{
+            "booking_id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"{event_id}:{user_email}")),
+            "event_id": event_id,
+            "user_id": str(uuid.uuid5(uuid.NAMESPACE_URL, user_email)),
+            "user_email": user_email,
+            "event_name": "Test Event",
+            "booking_time": datetime.now().isoformat(),
+            "status": "confirmed"
+        }])
+        if added:
             print("Participant added.")
         else:
             print("Participant already exists.")
@@ -34,24 +35,26 @@ def setup_test_data():
     print("Adding test event reminder...")
     session = get_notification_session()
     try:
-        # Check if reminder exists
-        existing = session.query(EventReminder).filter_by(event_id=event_id).first()
+        before_one_day = datetime.now(timezone.utc) - timedelta(minutes=1) # In the past
+        
+        # Reset an existing reminder in place; only insert when none was updated
+        result = session.execute(
+            update(EventReminder)
+            .where(EventReminder.event_id == event_id)
+            .values(before_one_day=before_one_day, notification_sent_for_one_day=False)
+        )
         
-        if not existing:
-            reminder = EventReminder(
+        if result.rowcount == 0:
+            session.add(EventReminder(
                 event_id=event_id,
-                before_one_day=datetime.now(timezone.utc) - timedelta(minutes=1), # In the past
+                before_one_day=before_one_day,
                 before_one_hour=datetime.now(timezone.utc) + timedelta(hours=1),
                 notification_sent_for_one_day=False,
                 notification_sent_for_one_hour=False
-            )
-            session.add(reminder)
+            ))
             session.commit()
             print("Event reminder added (scheduled for 1 minute ago).")
         else:
-            # Reset if exists
-            existing.before_one_day = datetime.now(timezone.utc) - timedelta(minutes=1)
-            existing.notification_sent_for_one_day = False
             session.commit()
             print("Existing event reminder reset to pending.")
             
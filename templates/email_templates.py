@@ -1,12 +1,65 @@
 """
 Email template management for different event types.
 """
-from typing import Dict
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
 from models.dto import EventType, Event
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Stands in for the recipient name in a prepared body; cannot occur in real event text
+NAME_PLACEHOLDER = "\x00name\x00"
+
+# A template split into its literal text and the field names that follow each piece
+CompiledTemplate = Tuple[Tuple[str, ...], Tuple[str, ...]]
+
+
+def _compile(template: str) -> CompiledTemplate:
+    """
+    Split a str.format template into static segments and field names.
+    Escaped braces are reduced to literal braces here, once, so rendering never
+    rescans the markup.
+    
+    Args:
+        template: Format string using plain {field} placeholders
+        
+    Returns:
+        Tuple of (segments, fields); segments[i] precedes fields[i], and the
+        final segment follows the last field
+    """
+    segments = []
+    fields = []
+    literal = ""
+    for text, field, _, _ in Formatter().parse(template):
+        literal += text
+        if field is not None:
+            segments.append(literal)
+            fields.append(field)
+            literal = ""
+    segments.append(literal)
+    return tuple(segments), tuple(fields)
+
+
+def _render(compiled: CompiledTemplate, values: Dict[str, object]) -> str:
+    """
+    Fill a compiled template with values; equivalent to template.format(**values).
+    
+    Args:
+        compiled: Output of _compile()
+        values: Field values keyed by name
+        
+    Returns:
+        Rendered string
+    """
+    segments, fields = compiled
+    parts = [segments[0]]
+    for field, segment in zip(fields, segments[1:]):
+        parts.append(str(values[field]))
+        parts.append(segment)
+    return "".join(parts)
+
 
 class EmailTemplateLoader:
     """Loads and manages email templates for different event types."""
@@ -331,6 +384,12 @@ class EmailTemplateLoader:
         }
     }
     
+    # TEMPLATES split into segments at import, so each render is a join
+    _COMPILED: Dict[EventType, Dict[str, CompiledTemplate]] = {
+        event_type: {part: _compile(text) for part, text in template.items()}
+        for event_type, template in TEMPLATES.items()
+    }
+    
     @classmethod
     def get_template(cls, event_type: EventType) -> Dict[str, str]:
         """
@@ -345,70 +404,161 @@ class EmailTemplateLoader:
         Raises:
             ValueError: If event type is not supported
         """
-        if event_type not in cls.TEMPLATES:
+        if not isinstance(event_type, str) or event_type not in cls.TEMPLATES:
             raise ValueError(f"No template found for event type: {event_type}")
         
-        logger.debug(f"Loading template for event type: {event_type}")
+        logger.debug("Loading template for event type: %s", event_type)
         return cls.TEMPLATES[event_type]
     
     @classmethod
-    def render_template(
+    def prepare_template(
         cls, 
         event_type: EventType, 
-        event: Event,
-        name: str
+        event: Event
     ) -> Dict[str, str]:
         """
-        Render email template with event and participant data.
+        Render the event-specific parts of a template once per event.
+        The body keeps NAME_PLACEHOLDER where the recipient name goes, so each
+        recipient costs a single str.replace instead of a full format.
         
         Args:
             event_type: Type of event
             event: Event object with details
-            name: Participant name
             
         Returns:
-            Dictionary with rendered 'subject' and 'body'
+            Dictionary with rendered 'subject' and name-less 'body'
+            
+        Raises:
+            ValueError: If event type is not supported
+        """
+        cls.get_template(event_type)
+        fields = (
+            event_type,
+            event.event_id,
+            event.event_name,
+            event.description,
+            event.get_formatted_start_time(),
+            event.get_formatted_end_time(),
+            event.location,
+            event.remaining_seats,
+            event.reminder_type
+        )
+        try:
+            subject, body = cls._prepare_cached(*fields)
+        except TypeError:
+            # Unhashable values (e.g. a list from queue JSON) cannot key the cache
+            subject, body = cls._prepare_cached.__wrapped__(cls, *fields)
+        return {'subject': subject, 'body': body}
+    
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _prepare_cached(
+        cls,
+        event_type: EventType,
+        event_id: str,
+        event_name: str,
+        description: Optional[str],
+        start_time: str,
+        end_time: str,
+        location: str,
+        remaining_seats: int,
+        reminder_type: Optional[str]
+    ) -> Tuple[str, str]:
         """
-        template = cls.get_template(event_type)
+        Render subject and name-less body, memoized on every event field the
+        templates read. Redelivered or retried messages for an unchanged event
+        reuse the earlier render; any edit to the event changes the key.
+        
+        Returns:
+            Tuple of (subject, body)
+        """
+        compiled = cls._COMPILED[event_type]
         
         # Format description section
         description_section = ""
-        if event.description:
+        if description:
             description_section = f"""
                 <div class="detail-row">
                     <span class="label">📝 Description:</span>
-                    <div class="value" style="margin-top: 5px;">{event.description}</div>
+                    <div class="value" style="margin-top: 5px;">{description}</div>
                 </div>
             """
         
         # Determine reminder message for event_reminder type
         reminder_message = ""
-        if event_type == 'event_reminder' and event.reminder_type:
-            if event.reminder_type == 'one_day':
+        if event_type == 'event_reminder' and reminder_type:
+            if reminder_type == 'one_day':
                 reminder_message = "Starting in 1 Day"
-            elif event.reminder_type == 'one_hour':
+            elif reminder_type == 'one_hour':
                 reminder_message = "Starting in 1 Hour"
             else:
                 reminder_message = "Upcoming Event"
         
-        rendered = {
-            'subject': template['subject'].format(
-                event_name=event.event_name,
-                event_id=event.event_id,
-                reminder_message=reminder_message
-            ),
-            'body': template['body'].format(
-                name=name,
-                event_id=event.event_id,
-                event_name=event.event_name,
-                location=event.location,
-                start_time=event.get_formatted_start_time(),
-                end_time=event.get_formatted_end_time(),
-                remaining_seats=event.remaining_seats,
-                description_section=description_section,
-                reminder_message=reminder_message
-            )
+        values = {
+            'name': NAME_PLACEHOLDER,
+            'event_id': event_id,
+            'event_name': event_name,
+            'location': location,
+            'start_time': start_time,
+            'end_time': end_time,
+            'remaining_seats': remaining_seats,
+            'description_section': description_section,
+            'reminder_message': reminder_message
         }
+        return _render(compiled['subject'], values), _render(compiled['body'], values)
+        
+    @staticmethod
+    def personalize(prepared: Dict[str, str], name: str) -> Dict[str, str]:
+        """
+        Fill the recipient name into a template from prepare_template().
+        
+        Args:
+            prepared: Output of prepare_template()
+            name: Participant name
+            
+        Returns:
+            Dictionary with rendered 'subject' and 'body'
+        """
+        return {
+            'subject': prepared['subject'],
+            'body': prepared['body'].replace(NAME_PLACEHOLDER, name)
+        }
+    
+    @staticmethod
+    def personalize_batch(prepared: Dict[str, str], names: List[str]) -> List[str]:
+        """
+        Fill each recipient name into the body of a template from prepare_template().
+        The subject does not depend on the recipient, so callers use prepared['subject'].
+        
+        Args:
+            prepared: Output of prepare_template()
+            names: Participant names
+            
+        Returns:
+            Rendered bodies, index-aligned with names
+        """
+        replace = prepared['body'].replace
+        return [replace(NAME_PLACEHOLDER, name) for name in names]
+    
+    @classmethod
+    def render_template(
+        cls, 
+        event_type: EventType, 
+        event: Event,
+        name: str
+    ) -> Dict[str, str]:
+        """
+        Render email template with event and participant data.
+        
+        Args:
+            event_type: Type of event
+            event: Event object with details
+            name: Participant name
+            
+        Returns:
+            Dictionary with rendered 'subject' and 'body'
+        """
+        rendered = cls.personalize(cls.prepare_template(event_type, event), name)
         
-        logger.debug(f"Rendered template for {name}, event={event.event_name}")
+        logger.debug("Rendered template for %s, event=%s", name, event.event_name)
         return rendered
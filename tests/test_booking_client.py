@@ -1,20 +1,41 @@
 """
 Unit tests for BookingAPIClient.
 """
+import json
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 import httpx
-from api.booking_client import BookingAPIClient
-from models.dto import BookingBatchResponse
+import api.booking_client as booking_client_module
+from api.booking_client import AsyncBookingAPIClient, BookingAPIClient, get_booking_client
+from config.settings import settings
+from models.dto import BookingBatchResponse, BookingContact
+
+
+def _response(status_code=200, payload=None):
+    """Build a mock httpx response with a JSON body, or raising for 5xx statuses."""
+    response = Mock()
+    response.status_code = status_code
+    response.content = json.dumps(payload).encode()
+    if status_code >= 500:
+        response.raise_for_status.side_effect = httpx.HTTPStatusError(
+            "Server error", request=Mock(), response=response
+        )
+    return response
 
 
 class TestBookingAPIClient:
     """Test suite for BookingAPIClient."""
     
     @pytest.fixture
-    def client(self):
-        """Create a test client instance."""
-        return BookingAPIClient(base_url="http://test-api:8000", timeout=10)
+    def mock_http_client(self):
+        """Create a mock for the underlying httpx.Client."""
+        return Mock()
+    
+    @pytest.fixture
+    def client(self, mock_http_client):
+        """Create a test client instance backed by the mock HTTP client."""
+        with patch('api.booking_client.httpx.Client', return_value=mock_http_client):
+            return BookingAPIClient(base_url="http://test-api:8000", timeout=10)
     
     def test_client_initialization(self, client):
         """Test that client initializes with correct configuration."""
@@ -26,62 +47,57 @@ class TestBookingAPIClient:
         client = BookingAPIClient(base_url="http://test-api:8000/")
         assert client.base_url == "http://test-api:8000"
     
-    @patch('httpx.Client')
-    def test_get_bookings_count_success(self, mock_httpx_client, client):
+    def test_max_inflight_defaults_to_settings(self, client):
+        """Test that the in-flight request cap comes from settings by default."""
+        assert client.max_inflight == settings.booking_service.max_inflight
+
+    def test_persistent_client_configuration(self):
+        """Test that a single pooled httpx.Client is created on init."""
+        with patch('api.booking_client.httpx.Client') as mock_httpx_client:
+            BookingAPIClient(base_url="http://test-api:8000/", timeout=10)
+            
+        mock_httpx_client.assert_called_once()
+        call_kwargs = mock_httpx_client.call_args[1]
+        assert call_kwargs['base_url'] == "http://test-api:8000"
+        assert call_kwargs['timeout'] == 10
+        assert isinstance(call_kwargs['limits'], httpx.Limits)
+        assert call_kwargs['http2'] == booking_client_module._use_http2()
+    
+    def test_http2_disabled_without_h2_package(self):
+        """Test that HTTP/2 is only requested when h2 is installed."""
+        with patch.object(booking_client_module, 'HTTP2_AVAILABLE', False):
+            assert booking_client_module._use_http2() is False
+    
+    def test_get_bookings_count_success(self, client, mock_http_client):
         """Test successful booking count retrieval."""
-        # Mock response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_http_client.get.return_value = _response(payload={
             "event_id": "test-event-123",
             "total_bookings": 42
-        }
-        
-        # Setup mock client
-        mock_context = Mock()
-        mock_context.__enter__ = Mock(return_value=mock_context)
-        mock_context.__exit__ = Mock(return_value=None)
-        mock_context.get = Mock(return_value=mock_response)
-        mock_httpx_client.return_value = mock_context
+        })
         
         # Execute
         count = client.get_bookings_count("test-event-123")
         
         # Assert
         assert count == 42
-        mock_context.get.assert_called_once_with(
-            "http://test-api:8000/bookings/count",
+        mock_http_client.get.assert_called_once_with(
+            "/bookings/count",
             params={"event_id": "test-event-123"}
         )
     
-    @patch('httpx.Client')
-    def test_get_bookings_count_empty_response(self, mock_httpx_client, client):
-        """Test booking count with empty response."""
-        # Mock response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {}
+    @pytest.mark.parametrize("payload", [{}, {"event_id": "test-event-123"}])
+    def test_get_bookings_count_missing_total_defaults_to_zero(self, client, mock_http_client, payload):
+        """Test that a count response without total_bookings counts as zero."""
+        mock_http_client.get.return_value = _response(payload=payload)
         
-        # Setup mock client
-        mock_context = Mock()
-        mock_context.__enter__ = Mock(return_value=mock_context)
-        mock_context.__exit__ = Mock(return_value=None)
-        mock_context.get = Mock(return_value=mock_response)
-        mock_httpx_client.return_value = mock_context
-        
-        # Execute
-        count = client.get_bookings_count("test-event-123")
-        
-        # Assert - should default to 0
-        assert count == 0
+        assert client.get_bookings_count("test-event-123") == 0
     
-    @patch('httpx.Client')
-    def test_get_bookings_batch_success(self, mock_httpx_client, client):
+    def test_get_bookings_batch_success(self, client, mock_http_client):
         """Test successful booking batch retrieval."""
         # Mock response
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = [
+        mock_response.content = json.dumps([
             {
                 "booking_id": "booking-1",
                 "event_id": "event-123",
@@ -100,14 +116,8 @@ class TestBookingAPIClient:
                 "booking_time": "2025-11-30T11:00:00",
                 "status": "confirmed"
             }
-        ]
-        
-        # Setup mock client
-        mock_context = Mock()
-        mock_context.__enter__ = Mock(return_value=mock_context)
-        mock_context.__exit__ = Mock(return_value=None)
-        mock_context.get = Mock(return_value=mock_response)
-        mock_httpx_client.return_value = mock_context
+        ]).encode()
+        mock_http_client.get.return_value = mock_response
         
         # Execute
         bookings = client.get_bookings_batch("event-123", offset=0, batch_size=10)
@@ -119,90 +129,164 @@ class TestBookingAPIClient:
         assert bookings[0].user_email == "user1@example.com"
         assert bookings[1].booking_id == "booking-2"
         
-        mock_context.get.assert_called_once_with(
-            "http://test-api:8000/bookings/batch",
+        mock_http_client.get.assert_called_once_with(
+            "/bookings/batch",
             params={"event_id": "event-123", "offset": 0, "batch_size": 10}
         )
     
-    @patch('httpx.Client')
-    def test_get_bookings_batch_404_returns_empty_list(self, mock_httpx_client, client):
-        """Test that 404 response returns empty list (no more results)."""
-        # Mock 404 response
-        mock_response = Mock()
-        mock_response.status_code = 404
+    @pytest.mark.parametrize("status_code, payload", [(404, None), (200, [])])
+    def test_get_bookings_batch_no_results(self, client, mock_http_client, status_code, payload):
+        """Test that a 404 or an empty array both mean no more bookings."""
+        mock_http_client.get.return_value = _response(status_code, payload)
         
-        # Setup mock client
-        mock_context = Mock()
-        mock_context.__enter__ = Mock(return_value=mock_context)
-        mock_context.__exit__ = Mock(return_value=None)
-        mock_context.get = Mock(return_value=mock_response)
-        mock_httpx_client.return_value = mock_context
+        assert client.get_bookings_batch("event-123", offset=100, batch_size=10) == []
+    
+    @pytest.mark.parametrize("call", [
+        lambda client: client.get_bookings_count("event-123"),
+        lambda client: client.get_bookings_batch("event-123", offset=0, batch_size=10)
+    ], ids=["count", "batch"])
+    def test_server_error_raises(self, client, mock_http_client, call):
+        """Test that 5xx responses raise from both endpoints."""
+        mock_http_client.get.return_value = _response(500)
         
-        # Execute
-        bookings = client.get_bookings_batch("event-123", offset=100, batch_size=10)
+        with pytest.raises(httpx.HTTPStatusError):
+            call(client)
+    
+    def test_client_reused_across_calls(self, client, mock_http_client):
+        """Test that consecutive calls share the same underlying HTTP client."""
+        mock_http_client.get.return_value = _response(payload=[])
         
-        # Assert - should return empty list, not raise exception
-        assert bookings == []
+        client.get_bookings_batch("event-123", offset=0, batch_size=10)
+        client.get_bookings_batch("event-123", offset=10, batch_size=10)
+        
+        assert mock_http_client.get.call_count == 2
     
-    @patch('httpx.Client')
-    def test_get_bookings_batch_empty_response(self, mock_httpx_client, client):
-        """Test booking batch with empty array response."""
-        # Mock response
+    def test_context_manager_closes_client(self, client, mock_http_client):
+        """Test that leaving the context manager closes the HTTP client."""
+        with client as entered:
+            assert entered is client
+            
+        mock_http_client.close.assert_called_once()
+    
+    def test_get_booking_client_returns_singleton(self):
+        """Test that get_booking_client reuses one shared instance."""
+        with patch.object(booking_client_module, '_booking_client', None):
+            first = get_booking_client()
+            second = get_booking_client()
+            
+            assert first is second
+
+
+class TestAsyncBookingAPIClient:
+    """Test suite for AsyncBookingAPIClient."""
+    
+    @pytest.fixture
+    def client(self):
+        """Create an async client instance."""
+        return AsyncBookingAPIClient(base_url="http://test-api:8000/", timeout=10, max_inflight=2)
+    
+    @staticmethod
+    def _booking(index):
+        """Build a booking payload for the given index."""
+        return {
+            "booking_id": f"booking-{index}",
+            "event_id": "event-123",
+            "user_id": f"user-{index}",
+            "user_email": f"user{index}@example.com"
+        }
+    
+    def test_client_initialization(self, client):
+        """Test that async client initializes with correct configuration."""
+        assert client.base_url == "http://test-api:8000"
+        assert client.timeout == 10
+        assert client.max_inflight == 2
+    
+    @pytest.mark.asyncio
+    async def test_get_bookings_count_success(self, client):
+        """Test successful async booking count retrieval."""
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = []
-        
-        # Setup mock client
-        mock_context = Mock()
-        mock_context.__enter__ = Mock(return_value=mock_context)
-        mock_context.__exit__ = Mock(return_value=None)
-        mock_context.get = Mock(return_value=mock_response)
-        mock_httpx_client.return_value = mock_context
+        mock_response.content = json.dumps({"event_id": "event-123", "total_bookings": 7}).encode()
         
-        # Execute
-        bookings = client.get_bookings_batch("event-123", offset=0, batch_size=10)
-        
-        # Assert
-        assert bookings == []
+        with patch.object(client._client, 'get', new_callable=AsyncMock, return_value=mock_response) as mock_get:
+            count = await client.get_bookings_count("event-123")
+            
+        assert count == 7
+        mock_get.assert_called_once_with("/bookings/count", params={"event_id": "event-123"})
     
-    @patch('httpx.Client')
-    def test_get_bookings_count_http_error(self, mock_httpx_client, client):
-        """Test HTTP error handling for count endpoint."""
-        # Mock error response
+    @pytest.mark.asyncio
+    async def test_get_bookings_batch_404_returns_empty_list(self, client):
+        """Test that async 404 response returns empty list."""
         mock_response = Mock()
-        mock_response.status_code = 500
-        mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
-            "Server error", request=Mock(), response=mock_response
-        )
-        
-        # Setup mock client
-        mock_context = Mock()
-        mock_context.__enter__ = Mock(return_value=mock_context)
-        mock_context.__exit__ = Mock(return_value=None)
-        mock_context.get = Mock(return_value=mock_response)
-        mock_httpx_client.return_value = mock_context
+        mock_response.status_code = 404
         
-        # Execute and assert
-        with pytest.raises(httpx.HTTPStatusError):
-            client.get_bookings_count("event-123")
+        with patch.object(client._client, 'get', new_callable=AsyncMock, return_value=mock_response):
+            bookings = await client.get_bookings_batch("event-123", offset=100, batch_size=10)
+            
+        assert bookings == []
     
-    @patch('httpx.Client')
-    def test_get_bookings_batch_http_error(self, mock_httpx_client, client):
-        """Test HTTP error handling for batch endpoint (non-404)."""
-        # Mock error response (500, not 404)
+    @pytest.mark.asyncio
+    async def test_get_booking_contacts_returns_email_and_name(self, client):
+        """Test that contact pages carry only the email and derived name."""
         mock_response = Mock()
-        mock_response.status_code = 500
-        mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
-            "Server error", request=Mock(), response=mock_response
-        )
-        
-        # Setup mock client
-        mock_context = Mock()
-        mock_context.__enter__ = Mock(return_value=mock_context)
-        mock_context.__exit__ = Mock(return_value=None)
-        mock_context.get = Mock(return_value=mock_response)
-        mock_httpx_client.return_value = mock_context
+        mock_response.status_code = 200
+        mock_response.content = json.dumps([self._booking(0), self._booking(1)]).encode()
         
-        # Execute and assert - should raise for non-404 errors
-        with pytest.raises(httpx.HTTPStatusError):
-            client.get_bookings_batch("event-123", offset=0, batch_size=10)
+        with patch.object(client._client, 'get', new_callable=AsyncMock, return_value=mock_response):
+            contacts = await client.get_booking_contacts("event-123", offset=0, batch_size=10)
+            
+        assert contacts == [
+            BookingContact("user0@example.com", "user0"),
+            BookingContact("user1@example.com", "user1")
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_prefetch_contacts_uses_contact_pages(self, client):
+        """Test that contact prefetching pages through get_booking_contacts."""
+        async def fake_contacts(event_id, offset, batch_size):
+            return [BookingContact(f"user{i}@example.com", f"user{i}") for i in range(offset, min(offset + batch_size, 3))]
+            
+        with patch.object(client, 'get_booking_contacts', side_effect=fake_contacts):
+            pages = [page async for page in client.prefetch_contacts("event-123", batch_size=2)]
+            
+        assert [[c.email for c in page] for page in pages] == [
+            ["user0@example.com", "user1@example.com"],
+            ["user2@example.com"]
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_async_context_manager_closes_client(self, client):
+        """Test that leaving the async context manager closes the HTTP client."""
+        with patch.object(client._client, 'aclose', new_callable=AsyncMock) as mock_aclose:
+            async with client as entered:
+                assert entered is client
+                
+        mock_aclose.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_prefetch_contacts_stops_on_empty_page(self, client):
+        """Test that prefetching stops when a page comes back empty."""
+        async def fake_contacts(event_id, offset, batch_size):
+            if offset >= 4:
+                return []
+            return [BookingContact(f"user{i}@example.com", f"user{i}") for i in range(offset, offset + batch_size)]
+            
+        with patch.object(client, 'get_booking_contacts', side_effect=fake_contacts):
+            pages = [
+                page async for page in client.prefetch_contacts("event-123", batch_size=2, readahead=3)
+            ]
+            
+        assert len(pages) == 2
+    
+    @pytest.mark.asyncio
+    async def test_prefetch_continues_past_capped_pages(self, client):
+        """Test that pages capped below batch_size by the API do not end iteration or skip rows."""
+        async def capped_contacts(event_id, offset, batch_size):
+            return [BookingContact(f"user{i}@example.com", f"user{i}") for i in range(offset, min(offset + 2, 5))]
+            
+        with patch.object(client, 'get_booking_contacts', side_effect=capped_contacts):
+            pages = [
+                page async for page in client.prefetch_contacts("event-123", batch_size=4, readahead=2)
+            ]
+            
+        assert [c.email for page in pages for c in page] == [f"user{i}@example.com" for i in range(5)]
@@ -3,7 +3,10 @@ Unit tests for database module.
 """
 import pytest
 from unittest.mock import Mock, patch
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
 from data.database import init_database, get_session, close_session, Participant
+from data.reminder_model import EventReminder  # noqa: F401 - registers event_reminders
 
 
 class TestDatabase:
@@ -72,3 +75,47 @@ class TestDatabase:
         # Should be able to create participant with minimal fields
         assert participant.booking_id == "booking-123"
         assert participant.user_email == "user@example.com"
+
+    def test_init_database_creates_missing_schema(self):
+        """Test that init_database creates tables on empty databases."""
+        main_engine = create_engine("sqlite://", poolclass=StaticPool)
+        notification_engine = create_engine("sqlite://", poolclass=StaticPool)
+        
+        with patch('data.database.engine', main_engine), \
+             patch('data.database.notification_engine', notification_engine):
+            init_database()
+            
+        assert "participants" in inspect(main_engine).get_table_names()
+        assert "event_reminders" in inspect(notification_engine).get_table_names()
+    
+    def test_init_database_skips_existing_schema(self):
+        """Test that create_all is skipped once the tables exist, unless forced."""
+        main_engine = create_engine("sqlite://", poolclass=StaticPool)
+        notification_engine = create_engine("sqlite://", poolclass=StaticPool)
+        
+        with patch('data.database.engine', main_engine), \
+             patch('data.database.notification_engine', notification_engine):
+            init_database()
+            
+            with patch('data.database.Base.metadata.create_all') as mock_create_all:
+                init_database()
+                mock_create_all.assert_not_called()
+                
+                init_database(force=True)
+                assert mock_create_all.call_count == 2
+    
+    def test_init_database_adds_missing_indexes_to_existing_schema(self):
+        """Test that indexes added to the models are created on existing tables."""
+        main_engine = create_engine("sqlite://", poolclass=StaticPool)
+        notification_engine = create_engine("sqlite://", poolclass=StaticPool)
+        
+        with patch('data.database.engine', main_engine), \
+             patch('data.database.notification_engine', notification_engine):
+            init_database()
+            with notification_engine.begin() as connection:
+                connection.execute(text("DROP INDEX ix_reminders_pending_1d"))
+                
+            init_database()
+            
+        index_names = {index['name'] for index in inspect(notification_engine).get_indexes('event_reminders')}
+        assert 'ix_reminders_pending_1d' in index_names
@@ -1,14 +1,30 @@
 """
 Unit tests for EmailService with provider support.
 """
+import asyncio
+import json
 import pytest
+import pytest_asyncio
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
 from email_service.email_service import (
     EmailService, 
     DummyEmailProvider, 
     SMTPEmailProvider,
-    SendGridEmailProvider
+    SendGridEmailProvider,
+    PermanentEmailError,
+    RateLimitedError,
+    close_sendgrid_client
 )
+import aiosmtplib
+
+
+def _settings(provider='smtp', dummy_mode=False, **email):
+    """Build a plain settings stand-in with the fields EmailService reads."""
+    return SimpleNamespace(
+        email=SimpleNamespace(dummy_mode=dummy_mode, provider=provider, max_concurrent=32, **email),
+        processor=SimpleNamespace(max_retries=3, retry_delay=1)
+    )
 
 
 class TestDummyEmailProvider:
@@ -34,15 +50,16 @@ class TestSMTPEmailProvider:
     
     @pytest.fixture
     def mock_config(self):
-        """Create a mock email configuration."""
-        config = Mock()
-        config.smtp_host = "smtp.example.com"
-        config.smtp_port = 587
-        config.smtp_username = "user@example.com"
-        config.smtp_password = "password"
-        config.from_name = "Test Service"
-        config.from_email = "noreply@example.com"
-        return config
+        """Create an email configuration for SMTP."""
+        return SimpleNamespace(
+            smtp_host="smtp.example.com",
+            smtp_port=587,
+            smtp_username="user@example.com",
+            smtp_password="password",
+            smtp_pool_size=2,
+            from_name="Test Service",
+            from_email="noreply@example.com"
+        )
     
     @pytest.mark.asyncio
     async def test_smtp_send_email_success(self, mock_config):
@@ -98,6 +115,101 @@ class TestSMTPEmailProvider:
             assert call_kwargs['use_tls'] is True
             assert call_kwargs['start_tls'] is False
     
+    @staticmethod
+    def _smtp_client():
+        """Build a connected SMTP client mock bound to the running loop."""
+        async def _network_round_trip(*args, **kwargs):
+            await asyncio.sleep(0)
+            
+        smtp = MagicMock()
+        smtp.connect = AsyncMock(side_effect=_network_round_trip)
+        smtp.send_message = AsyncMock(side_effect=_network_round_trip)
+        smtp.quit = AsyncMock()
+        smtp.is_connected = True
+        smtp.loop = asyncio.get_running_loop()
+        return smtp
+    
+    @pytest.mark.asyncio
+    async def test_smtp_send_batch_reuses_connections(self, mock_config):
+        """Test that a batch is spread over a fixed pool of SMTP connections."""
+        provider = SMTPEmailProvider(mock_config)
+        smtp = self._smtp_client()
+        
+        with patch('email_service.email_service.aiosmtplib.SMTP', return_value=smtp) as mock_smtp:
+            results = await provider.send_batch([
+                (f"user{i}@example.com", "Subject", "<p>Body</p>")
+                for i in range(5)
+            ])
+            
+        assert results == [True] * 5
+        assert mock_smtp.call_count == 2
+        assert mock_smtp.call_args[1]['hostname'] == "smtp.example.com"
+        assert smtp.send_message.call_count == 5
+    
+    @pytest.mark.asyncio
+    async def test_smtp_connections_kept_between_batches(self, mock_config):
+        """Test that a later batch reuses open connections and close() quits them."""
+        provider = SMTPEmailProvider(mock_config)
+        smtp = self._smtp_client()
+        emails = [(f"user{i}@example.com", "Subject", "<p>Body</p>") for i in range(4)]
+        
+        with patch('email_service.email_service.aiosmtplib.SMTP', return_value=smtp) as mock_smtp:
+            await provider.send_batch(emails)
+            await provider.send_batch(emails)
+            
+        assert mock_smtp.call_count == 2
+        assert smtp.connect.call_count == 2
+        assert smtp.send_message.call_count == 8
+        
+        await provider.close()
+        assert smtp.quit.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_smtp_connection_replaced_after_message_limit(self, mock_config):
+        """Test that a connection is quit once it reaches the per-connection limit."""
+        mock_config.smtp_pool_size = 1
+        provider = SMTPEmailProvider(mock_config)
+        smtp = self._smtp_client()
+        
+        with patch('email_service.email_service.MAX_MESSAGES_PER_CONNECTION', 2), \
+             patch('email_service.email_service.aiosmtplib.SMTP', return_value=smtp) as mock_smtp:
+            results = await provider.send_batch([
+                (f"user{i}@example.com", "Subject", "<p>Body</p>")
+                for i in range(3)
+            ])
+            
+        assert results == [True] * 3
+        assert mock_smtp.call_count == 2
+        smtp.quit.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_smtp_send_batch_connection_failure(self, mock_config):
+        """Test that emails are reported as failed when no connection opens."""
+        provider = SMTPEmailProvider(mock_config)
+        smtp = self._smtp_client()
+        smtp.connect.side_effect = OSError("refused")
+        
+        with patch('email_service.email_service.aiosmtplib.SMTP', return_value=smtp):
+            results = await provider.send_batch([
+                ("user1@example.com", "Subject", "<p>Body</p>"),
+                ("user2@example.com", "Subject", "<p>Body</p>")
+            ])
+            
+        assert all(isinstance(r, Exception) for r in results)
+    
+    def test_create_message(self, mock_config):
+        """Test that messages are a single HTML part with the configured sender."""
+        mock_config.from_name = "Terrapin Events, Inc."
+        provider = SMTPEmailProvider(mock_config)
+        
+        message = provider._create_message("user@example.com", "Subject", "<p>Hi 📅</p>")
+        
+        assert message.get_content_type() == "text/html"
+        assert message['To'] == "user@example.com"
+        assert message['Subject'] == "Subject"
+        assert message['From'] == '"Terrapin Events, Inc." <noreply@example.com>'
+        assert message.get_payload(decode=True).decode() == "<p>Hi 📅</p>"
+    
     def test_get_provider_name(self, mock_config):
         """Test provider name."""
         provider = SMTPEmailProvider(mock_config)
@@ -107,28 +219,28 @@ class TestSMTPEmailProvider:
 class TestSendGridEmailProvider:
     """Test suite for SendGridEmailProvider."""
     
+    @pytest_asyncio.fixture(autouse=True)
+    async def close_shared_client(self):
+        """Close the shared SendGrid client each test opens, so none leaks into later tests."""
+        yield
+        await close_sendgrid_client()
+    
     @pytest.fixture
     def mock_config(self):
-        """Create a mock email configuration with SendGrid API key."""
-        config = Mock()
-        config.sendgrid_api_key = "test_api_key"
-        config.from_name = "Test Service"
-        config.from_email = "noreply@example.com"
-        return config
+        """Create an email configuration with SendGrid API key."""
+        return SimpleNamespace(
+            sendgrid_api_key="test_api_key",
+            from_name="Test Service",
+            from_email="noreply@example.com"
+        )
     
     @pytest.mark.asyncio
     async def test_sendgrid_send_email_success(self, mock_config):
         """Test successful email sending via SendGrid."""
-        with patch('sendgrid.SendGridAPIClient') as mock_sg_client, \
-             patch('sendgrid.helpers.mail.Mail') as mock_mail:
-            # Mock the SendGrid response
-            mock_response = Mock()
-            mock_response.status_code = 202
-            mock_client_instance = Mock()
-            mock_client_instance.send.return_value = mock_response
-            mock_sg_client.return_value = mock_client_instance
+        provider = SendGridEmailProvider(mock_config)
             
-            provider = SendGridEmailProvider(mock_config)
+        with patch.object(provider.client, 'post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = Mock(status_code=202)
             
             result = await provider.send_email(
                 to="recipient@example.com",
@@ -137,22 +249,20 @@ class TestSendGridEmailProvider:
             )
             
             assert result is True
-            mock_client_instance.send.assert_called_once()
+            mock_post.assert_called_once()
+            assert mock_post.call_args[0][0] == "/v3/mail/send"
+            payload = json.loads(mock_post.call_args[1]['content'])
+            assert payload['personalizations'] == [{"to": [{"email": "recipient@example.com"}]}]
+            assert payload['from'] == {"email": "noreply@example.com", "name": "Test Service"}
+            assert payload['content'] == [{"type": "text/html", "value": "<p>Test Body</p>"}]
     
     @pytest.mark.asyncio
     async def test_sendgrid_send_email_failure(self, mock_config):
         """Test failed email sending via SendGrid."""
-        with patch('sendgrid.SendGridAPIClient') as mock_sg_client, \
-             patch('sendgrid.helpers.mail.Mail') as mock_mail:
-            # Mock a failed SendGrid response
-            mock_response = Mock()
-            mock_response.status_code = 400
-            mock_response.body = "Bad Request"
-            mock_client_instance = Mock()
-            mock_client_instance.send.return_value = mock_response
-            mock_sg_client.return_value = mock_client_instance
-            
-            provider = SendGridEmailProvider(mock_config)
+        provider = SendGridEmailProvider(mock_config)
+            
+        with patch.object(provider.client, 'post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = Mock(status_code=400, text="Bad Request")
             
             with pytest.raises(Exception):
                 await provider.send_email(
@@ -161,64 +271,80 @@ class TestSendGridEmailProvider:
                     body="<p>Test Body</p>"
                 )
     
+    @pytest.mark.asyncio
+    async def test_sendgrid_rate_limit_reports_retry_after(self, mock_config):
+        """Test that a 429 raises RateLimitedError carrying the Retry-After wait."""
+        provider = SendGridEmailProvider(mock_config)
+        
+        with patch.object(provider.client, 'post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = Mock(status_code=429, text="Too Many Requests", headers={"Retry-After": "2"})
+            
+            with pytest.raises(RateLimitedError) as excinfo:
+                await provider.send_email("recipient@example.com", "Subject", "<p>Body</p>")
+                
+        assert excinfo.value.retry_after == 2.0
+    
+    def test_sendgrid_reuses_http_client(self, mock_config):
+        """Test that providers share one pooled HTTP client."""
+        first = SendGridEmailProvider(mock_config)
+        second = SendGridEmailProvider(mock_config)
+        
+        assert first.client is second.client
+        assert first.client.headers["Authorization"] == "Bearer test_api_key"
+        assert first.client.headers["Content-Type"] == "application/json"
+    
     def test_sendgrid_missing_api_key(self):
         """Test SendGridEmailProvider raises error when API key is missing."""
-        config = Mock()
-        config.sendgrid_api_key = ""
+        config = SimpleNamespace(sendgrid_api_key="")
         
         with pytest.raises(ValueError, match="SENDGRID_API_KEY"):
             SendGridEmailProvider(config)
     
     def test_get_provider_name(self, mock_config):
         """Test provider name."""
-        with patch('sendgrid.SendGridAPIClient'), \
-             patch('sendgrid.helpers.mail.Mail'):
-            provider = SendGridEmailProvider(mock_config)
-            assert provider.get_provider_name() == "SendGrid (HTTP API)"
+        provider = SendGridEmailProvider(mock_config)
+        assert provider.get_provider_name() == "SendGrid (HTTP API)"
 
 
 class TestEmailService:
     """Test suite for EmailService."""
     
+    @pytest.fixture(autouse=True)
+    def mock_sleep(self):
+        """Skip retry backoff waits; tests that check delays read the mock."""
+        with patch('asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            yield mock_sleep
+    
     @pytest.fixture
-    def smtp_email_service(self):
+    def smtp_email_service(self, monkeypatch):
         """Create an EmailService instance with SMTP provider."""
-        with patch('email_service.email_service.settings') as mock_settings:
-            mock_settings.email.dummy_mode = False
-            mock_settings.email.provider = 'smtp'
-            mock_settings.email.smtp_host = "smtp.example.com"
-            mock_settings.email.smtp_port = 587
-            mock_settings.email.smtp_username = "user@example.com"
-            mock_settings.email.smtp_password = "password"
-            mock_settings.email.from_name = "Test Service"
-            mock_settings.email.from_email = "noreply@example.com"
-            mock_settings.processor.max_retries = 3
-            mock_settings.processor.retry_delay = 1
-            return EmailService()
+        monkeypatch.setattr('email_service.email_service.settings', _settings(
+            smtp_host="smtp.example.com",
+            smtp_port=587,
+            smtp_username="user@example.com",
+            smtp_password="password",
+            smtp_pool_size=2,
+            from_name="Test Service",
+            from_email="noreply@example.com"
+        ))
+        return EmailService()
     
     @pytest.fixture
-    def dummy_email_service(self):
+    def dummy_email_service(self, monkeypatch):
         """Create an EmailService instance in dummy mode."""
-        with patch('email_service.email_service.settings') as mock_settings:
-            mock_settings.email.dummy_mode = True
-            mock_settings.email.provider = 'smtp'
-            return EmailService()
+        monkeypatch.setattr('email_service.email_service.settings', _settings(dummy_mode=True))
+        return EmailService()
     
     @pytest.fixture
-    def sendgrid_email_service(self):
+    def sendgrid_email_service(self, monkeypatch):
         """Create an EmailService instance with SendGrid provider."""
-        with patch('email_service.email_service.settings') as mock_settings:
-            mock_settings.email.dummy_mode = False
-            mock_settings.email.provider = 'sendgrid'
-            mock_settings.email.sendgrid_api_key = "test_api_key"
-            mock_settings.email.from_name = "Test Service"
-            mock_settings.email.from_email = "noreply@example.com"
-            mock_settings.processor.max_retries = 3
-            mock_settings.processor.retry_delay = 1
-            
-            with patch('sendgrid.SendGridAPIClient'), \
-                 patch('sendgrid.helpers.mail.Mail'):
-                return EmailService()
+        monkeypatch.setattr('email_service.email_service.settings', _settings(
+            provider='sendgrid',
+            sendgrid_api_key="test_api_key",
+            from_name="Test Service",
+            from_email="noreply@example.com"
+        ))
+        return EmailService()
     
     def test_create_dummy_provider(self, dummy_email_service):
         """Test that dummy mode creates DummyEmailProvider."""
@@ -232,14 +358,12 @@ class TestEmailService:
         """Test that SendGrid provider is created correctly."""
         assert isinstance(sendgrid_email_service.provider, SendGridEmailProvider)
     
-    def test_invalid_provider(self):
+    def test_invalid_provider(self, monkeypatch):
         """Test that invalid provider raises ValueError."""
-        with patch('email_service.email_service.settings') as mock_settings:
-            mock_settings.email.dummy_mode = False
-            mock_settings.email.provider = 'invalid'
-            
-            with pytest.raises(ValueError, match="Unknown email provider"):
-                EmailService()
+        monkeypatch.setattr('email_service.email_service.settings', _settings(provider='invalid'))
+        
+        with pytest.raises(ValueError, match="Unknown email provider"):
+            EmailService()
     
     @pytest.mark.asyncio
     async def test_dummy_mode_send_email(self, dummy_email_service):
@@ -278,12 +402,11 @@ class TestEmailService:
                 None
             ]
             
-            with patch('asyncio.sleep', new_callable=AsyncMock):
-                result = await smtp_email_service.send_email(
-                    to="recipient@example.com",
-                    subject="Test Subject",
-                    body="<p>Test Body</p>"
-                )
+            result = await smtp_email_service.send_email(
+                to="recipient@example.com",
+                subject="Test Subject",
+                body="<p>Test Body</p>"
+            )
             
             assert result is True
             assert mock_send.call_count == 3
@@ -294,21 +417,120 @@ class TestEmailService:
         with patch('email_service.email_service.aiosmtplib.send', new_callable=AsyncMock) as mock_send:
             mock_send.side_effect = Exception("Connection failed")
             
-            with patch('asyncio.sleep', new_callable=AsyncMock):
-                result = await smtp_email_service.send_email(
-                    to="recipient@example.com",
-                    subject="Test Subject",
-                    body="<p>Test Body</p>"
-                )
+            result = await smtp_email_service.send_email(
+                to="recipient@example.com",
+                subject="Test Subject",
+                body="<p>Test Body</p>"
+            )
             
             assert result is False
             # Initial + 3 retries = 4 total attempts
             assert mock_send.call_count == 4
     
+    @pytest.mark.asyncio
+    async def test_send_email_retry_backoff(self, smtp_email_service, mock_sleep):
+        """Test that retry delays are drawn from a growing full-jitter window."""
+        with patch('email_service.email_service.aiosmtplib.send', new_callable=AsyncMock) as mock_send:
+            mock_send.side_effect = Exception("Connection failed")
+            
+            await smtp_email_service.send_email(
+                to="recipient@example.com",
+                subject="Test Subject",
+                body="<p>Test Body</p>"
+            )
+            
+            delays = [c[0][0] for c in mock_sleep.call_args_list]
+            assert len(delays) == 3
+            for ceiling, delay in zip([1, 2, 4], delays):
+                assert 0 <= delay <= ceiling
+    
+    @pytest.mark.asyncio
+    async def test_send_email_after_failed_first_attempt(self, smtp_email_service, mock_sleep):
+        """Test that retries of a batch failure back off first and stay within max_retries."""
+        with patch('email_service.email_service.aiosmtplib.send', new_callable=AsyncMock) as mock_send:
+            mock_send.side_effect = Exception("Connection failed")
+            
+            result = await smtp_email_service.send_email(
+                "recipient@example.com", "Subject", "<p>Body</p>", first_attempt_failed=True
+            )
+            
+        assert result is False
+        # The batch attempt plus these 3 keeps the total at initial + 3 retries
+        assert mock_send.call_count == 3
+        delays = [c[0][0] for c in mock_sleep.call_args_list]
+        assert len(delays) == 3
+        for ceiling, delay in zip([1, 2, 4], delays):
+            assert 0 <= delay <= ceiling
+    
+    @pytest.mark.asyncio
+    async def test_retry_jitter_range(self, smtp_email_service, monkeypatch):
+        """Test that each retry sleeps for a uniform draw below the capped exponential delay."""
+        slow_retries = _settings()
+        slow_retries.processor.retry_delay = 20
+        monkeypatch.setattr('email_service.email_service.settings', slow_retries)
+        
+        with patch('email_service.email_service.aiosmtplib.send', new_callable=AsyncMock) as mock_send, \
+             patch('email_service.email_service.random.uniform', return_value=0.5) as mock_uniform:
+            mock_send.side_effect = Exception("Connection failed")
+            
+            await smtp_email_service.send_email("recipient@example.com", "Subject", "<p>Body</p>")
+            
+        assert [c[0] for c in mock_uniform.call_args_list] == [(0, 20), (0, 30), (0, 30)]
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("error", [
+        PermanentEmailError("SendGrid returned status 400"),
+        aiosmtplib.SMTPRecipientRefused(550, "No such user", "recipient@example.com"),
+        aiosmtplib.SMTPAuthenticationError(535, "Bad credentials")
+    ])
+    async def test_permanent_failure_not_retried(self, smtp_email_service, mock_sleep, error):
+        """Test that rejected sends give up without retrying."""
+        with patch('email_service.email_service.aiosmtplib.send', new_callable=AsyncMock) as mock_send:
+            mock_send.side_effect = error
+            
+            result = await smtp_email_service.send_email("recipient@example.com", "Subject", "<p>Body</p>")
+            
+        assert result is False
+        mock_send.assert_called_once()
+        mock_sleep.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_sendgrid_retry_after(self, sendgrid_email_service, mock_sleep):
+        """Test that a rate-limited send waits for Retry-After, plus jitter, before retrying."""
+        provider = sendgrid_email_service.provider
+        with patch.object(provider.client, 'post', new_callable=AsyncMock) as mock_post:
+            mock_post.side_effect = [
+                Mock(status_code=429, text="Too Many Requests", headers={"Retry-After": "2"}),
+                Mock(status_code=202)
+            ]
+            
+            result = await sendgrid_email_service.send_email("recipient@example.com", "Subject", "<p>Body</p>")
+            
+        assert result is True
+        assert mock_post.call_count == 2
+        delay = mock_sleep.call_args[0][0]
+        assert 2 <= delay <= 2.5
+    
+    @pytest.mark.asyncio
+    async def test_send_email_retries_temporary_smtp_rejection(self, smtp_email_service):
+        """Test that a 4xx SMTP reply is retried."""
+        with patch('email_service.email_service.aiosmtplib.send', new_callable=AsyncMock) as mock_send:
+            mock_send.side_effect = [
+                aiosmtplib.SMTPRecipientRefused(450, "Mailbox busy", "recipient@example.com"),
+                None
+            ]
+            
+            result = await smtp_email_service.send_email("recipient@example.com", "Subject", "<p>Body</p>")
+            
+        assert result is True
+        assert mock_send.call_count == 2
+    
     @pytest.mark.asyncio
     async def test_send_batch_success(self, smtp_email_service):
         """Test batch email sending."""
-        with patch('email_service.email_service.aiosmtplib.send', new_callable=AsyncMock):
+        with patch.object(smtp_email_service.provider, 'send_batch', new_callable=AsyncMock) as mock_batch, \
+             patch.object(smtp_email_service, 'send_email', new_callable=AsyncMock) as mock_send:
+            mock_batch.return_value = [True, True, True]
             emails = [
                 ("user1@example.com", "Subject 1", "<p>Body 1</p>"),
                 ("user2@example.com", "Subject 2", "<p>Body 2</p>"),
@@ -319,13 +541,17 @@ class TestEmailService:
             
             assert successful == 3
             assert failed == 0
+            mock_batch.assert_called_once_with(emails)
+            mock_send.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_send_batch_partial_failure(self, smtp_email_service):
         """Test batch email sending with partial failures."""
-        with patch.object(smtp_email_service, 'send_email', new_callable=AsyncMock) as mock_send:
-            # First succeeds, second fails, third succeeds
-            mock_send.side_effect = [True, False, True]
+        with patch.object(smtp_email_service.provider, 'send_batch', new_callable=AsyncMock) as mock_batch, \
+             patch.object(smtp_email_service, 'send_email', new_callable=AsyncMock) as mock_send:
+            # Second email fails in the batch and again on its individual retry
+            mock_batch.return_value = [True, Exception("Error"), True]
+            mock_send.return_value = False
             
             emails = [
                 ("user1@example.com", "Subject 1", "<p>Body 1</p>"),
@@ -337,33 +563,110 @@ class TestEmailService:
             
             assert successful == 2
             assert failed == 1
+            mock_send.assert_called_once_with(
+                "user2@example.com", "Subject 2", "<p>Body 2</p>", first_attempt_failed=True
+            )
+    
+    @pytest.mark.asyncio
+    async def test_send_batch_chunks_by_max_concurrent(self, smtp_email_service):
+        """Test that a large batch reaches the provider in bounded chunks."""
+        smtp_email_service.max_concurrent = 2
+        
+        async def _all_sent(chunk):
+            return [True] * len(chunk)
+            
+        with patch.object(smtp_email_service.provider, 'send_batch', side_effect=_all_sent) as mock_batch:
+            emails = [
+                (f"user{i}@example.com", "Subject", "<p>Body</p>")
+                for i in range(5)
+            ]
+            
+            successful, failed = await smtp_email_service.send_batch(emails)
+            
+        assert (successful, failed) == (5, 0)
+        assert [len(c[0][0]) for c in mock_batch.call_args_list] == [2, 2, 1]
+    
+    @pytest.mark.asyncio
+    async def test_send_batch_early_abort(self, smtp_email_service):
+        """Test that a large batch stops once a third of its first attempts fail."""
+        smtp_email_service.max_concurrent = 5
+        
+        async def _all_failed(chunk):
+            return [ConnectionError("refused")] * len(chunk)
+            
+        with patch.object(smtp_email_service.provider, 'send_batch', side_effect=_all_failed) as mock_batch, \
+             patch.object(smtp_email_service, 'send_email', new_callable=AsyncMock) as mock_send:
+            emails = [
+                (f"user{i}@example.com", "Subject", "<p>Body</p>")
+                for i in range(30)
+            ]
+            
+            successful, failed = await smtp_email_service.send_batch(emails)
+            
+        assert (successful, failed) == (0, 30)
+        assert mock_batch.call_count == 2
+        assert mock_send.call_count <= 10
+    
+    @pytest.mark.asyncio
+    async def test_send_batch_rejected_recipients_do_not_abort(self, smtp_email_service):
+        """Test that permanently refused recipients do not stop the rest of the batch."""
+        smtp_email_service.max_concurrent = 5
+        refused = aiosmtplib.SMTPRecipientRefused(550, "No such user", "bad@example.com")
+        
+        async def _first_chunks_refused(chunk):
+            return [refused if "bad" in to else True for to, _, _ in chunk]
+            
+        with patch.object(smtp_email_service.provider, 'send_batch', side_effect=_first_chunks_refused) as mock_batch, \
+             patch.object(smtp_email_service, 'send_email', new_callable=AsyncMock) as mock_send:
+            emails = [
+                (f"{'bad' if i < 15 else 'user'}{i}@example.com", "Subject", "<p>Body</p>")
+                for i in range(30)
+            ]
+            
+            successful, failed = await smtp_email_service.send_batch(emails)
+            
+        assert (successful, failed) == (15, 15)
+        assert mock_batch.call_count == 6
+        mock_send.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_send_batch_small_batch_not_aborted(self, smtp_email_service):
+        """Test that batches under the abort threshold retry every failure."""
+        with patch.object(smtp_email_service.provider, 'send_batch', new_callable=AsyncMock) as mock_batch, \
+             patch.object(smtp_email_service, 'send_email', new_callable=AsyncMock) as mock_send:
+            mock_batch.return_value = [ConnectionError("refused")] * 3
+            mock_send.return_value = True
+            
+            successful, failed = await smtp_email_service.send_batch([
+                (f"user{i}@example.com", "Subject", "<p>Body</p>")
+                for i in range(3)
+            ])
+            
+        assert (successful, failed) == (3, 0)
+        assert mock_send.call_count == 3
     
     @pytest.mark.asyncio
     async def test_sendgrid_send_email_success(self, sendgrid_email_service):
         """Test successful email sending via SendGrid."""
-        with patch('sendgrid.SendGridAPIClient') as mock_sg_client, \
-             patch('sendgrid.helpers.mail.Mail') as mock_mail:
-            # Mock the SendGrid response
-            mock_response = Mock()
-            mock_response.status_code = 202
-            mock_client_instance = Mock()
-            mock_client_instance.send.return_value = mock_response
-            mock_sg_client.return_value = mock_client_instance
-            
-            # Recreate service to use the mocked client
-            with patch('email_service.email_service.settings') as mock_settings:
-                mock_settings.email.dummy_mode = False
-                mock_settings.email.provider = 'sendgrid'
-                mock_settings.email.sendgrid_api_key = "test_api_key"
-                mock_settings.email.from_name = "Test Service"
-                mock_settings.email.from_email = "noreply@example.com"
-                mock_settings.processor.max_retries = 3
+        provider = sendgrid_email_service.provider
+        with patch.object(provider.client, 'post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = Mock(status_code=202)
+            
+            result = await sendgrid_email_service.send_email(
+                to="recipient@example.com",
+                subject="Test Subject",
+                body="<p>Test Body</p>"
+            )
                 
-                service = EmailService()
-                result = await service.send_email(
-                    to="recipient@example.com",
-                    subject="Test Subject",
-                    body="<p>Test Body</p>"
-                )
+            assert result is True
                 
-                assert result is True
+    @pytest.mark.asyncio
+    async def test_close_keeps_shared_sendgrid_client(self, sendgrid_email_service):
+        """Test that closing one service leaves the shared SendGrid client to close_sendgrid_client()."""
+        client = sendgrid_email_service.provider.client
+        
+        await sendgrid_email_service.close()
+        assert not client.is_closed
+        
+        await close_sendgrid_client()
+        assert client.is_closed
@@ -2,26 +2,46 @@
 Unit tests for DTO models.
 """
 import pytest
-from models.dto import BookingBatchResponse, Event, NotificationMessage
+from models.dto import BookingBatchResponse, Event, NotificationMessage, _format_iso
 import json
 
 
+@pytest.fixture
+def booking_data():
+    """A complete booking payload as returned by the booking service."""
+    return {
+        "booking_id": "booking-123",
+        "event_id": "event-456",
+        "user_id": "user-789",
+        "user_email": "test@example.com",
+        "event_name": "Test Event",
+        "booking_time": "2025-11-30T10:00:00",
+        "status": "confirmed"
+    }
+
+
+@pytest.fixture
+def event_data():
+    """A complete event payload as carried in notification messages."""
+    return {
+        "event_id": "event-123",
+        "event_name": "Test Event",
+        "description": "A test event",
+        "start_time": "2025-12-01T10:00:00",
+        "end_time": "2025-12-01T12:00:00",
+        "organizer_id": "org-456",
+        "location": "Test Room",
+        "remaining_seats": 10,
+        "reminder_type": "one_day"
+    }
+
+
 class TestBookingBatchResponse:
     """Test suite for BookingBatchResponse model."""
     
-    def test_from_dict_complete_data(self):
+    def test_from_dict_complete_data(self, booking_data):
         """Test creating BookingBatchResponse from complete dictionary."""
-        data = {
-            "booking_id": "booking-123",
-            "event_id": "event-456",
-            "user_id": "user-789",
-            "user_email": "test@example.com",
-            "event_name": "Test Event",
-            "booking_time": "2025-11-30T10:00:00",
-            "status": "confirmed"
-        }
-        
-        booking = BookingBatchResponse.from_dict(data)
+        booking = BookingBatchResponse.from_dict(booking_data)
         
         assert booking.booking_id == "booking-123"
         assert booking.event_id == "event-456"
@@ -31,16 +51,11 @@ class TestBookingBatchResponse:
         assert booking.booking_time == "2025-11-30T10:00:00"
         assert booking.status == "confirmed"
     
-    def test_from_dict_minimal_data(self):
+    def test_from_dict_minimal_data(self, booking_data):
         """Test creating BookingBatchResponse with minimal required fields."""
-        data = {
-            "booking_id": "booking-123",
-            "event_id": "event-456",
-            "user_id": "user-789",
-            "user_email": "test@example.com"
-        }
+        required = ("booking_id", "event_id", "user_id", "user_email")
         
-        booking = BookingBatchResponse.from_dict(data)
+        booking = BookingBatchResponse.from_dict({key: booking_data[key] for key in required})
         
         assert booking.booking_id == "booking-123"
         assert booking.event_id == "event-456"
@@ -88,21 +103,9 @@ class TestBookingBatchResponse:
 class TestEvent:
     """Test suite for Event model."""
     
-    def test_from_dict_complete_data(self):
+    def test_from_dict_complete_data(self, event_data):
         """Test creating Event from complete dictionary."""
-        data = {
-            "event_id": "event-123",
-            "event_name": "Test Event",
-            "description": "A test event",
-            "start_time": "2025-12-01T10:00:00",
-            "end_time": "2025-12-01T12:00:00",
-            "organizer_id": "org-456",
-            "location": "Test Room",
-            "remaining_seats": 10,
-            "reminder_type": "one_day"
-        }
-        
-        event = Event.from_dict(data)
+        event = Event.from_dict(event_data)
         
         assert event.event_id == "event-123"
         assert event.event_name == "Test Event"
@@ -114,89 +117,56 @@ class TestEvent:
         assert event.remaining_seats == 10
         assert event.reminder_type == "one_day"
     
-    def test_get_formatted_start_time(self):
-        """Test formatted start time generation."""
-        event = Event.from_dict({
-            'event_id': 'evt-1',
-            'event_name': 'Conference',
-            'start_time': '2024-12-15T10:00:00',
-            'end_time': '2024-12-15T12:00:00'
-        })
+    @pytest.mark.parametrize("start_time", ["2024-12-15T10:00:00", "2024-12-15T10:00:00Z"])
+    def test_get_formatted_start_time(self, event_data, start_time):
+        """Test formatted start time generation, with and without a Z suffix."""
+        event = Event.from_dict({**event_data, 'start_time': start_time})
         
-        formatted = event.get_formatted_start_time()
-        # Should format to something like "December 15, 2024 at 10:00 AM"
-        assert 'December' in formatted or '12' in formatted
+        assert event.get_formatted_start_time() == 'December 15, 2024 at 10:00 AM'
     
-    def test_get_formatted_start_time_with_z(self):
-        """Test formatted start time with Z timezone."""
-        event = Event.from_dict({
-            'event_id': 'evt-1',
-            'event_name': 'Conference',
-            'start_time': '2024-12-15T10:00:00Z',
-            'end_time': '2024-12-15T12:00:00Z'
-        })
-        
-        formatted = event.get_formatted_start_time()
-        assert len(formatted) > 0
-    
-    def test_get_formatted_start_time_invalid(self):
+    def test_get_formatted_start_time_invalid(self, event_data):
         """Test formatted start time with invalid format."""
-        event = Event.from_dict({
-            'event_id': 'evt-1',
-            'event_name': 'Conference',
-            'start_time': 'invalid-time',
-            'end_time': 'invalid-time'
-        })
+        event = Event.from_dict({**event_data, 'start_time': 'invalid-time'})
         
         # Should return the original string when parsing fails
-        formatted = event.get_formatted_start_time()
-        assert formatted == 'invalid-time'
+        assert event.get_formatted_start_time() == 'invalid-time'
     
-    def test_get_formatted_end_time(self):
+    def test_formatted_times_are_memoized(self):
+        """Test that identical timestamps are parsed once across events."""
+        _format_iso.cache_clear()
+        events = [
+            Event.from_dict({
+                'event_id': f'evt-{i}',
+                'start_time': '2024-12-15T10:00:00Z'
+            })
+            for i in range(3)
+        ]
+        
+        formatted = {event.get_formatted_start_time() for event in events}
+        
+        assert formatted == {'December 15, 2024 at 10:00 AM'}
+        assert _format_iso.cache_info().misses == 1
+    
+    def test_get_formatted_end_time(self, event_data):
         """Test formatted end time generation."""
-        event = Event.from_dict({
-            'event_id': 'evt-1',
-            'event_name': 'Conference',
-            'start_time': '2024-12-15T10:00:00',
-            'end_time': '2024-12-15T12:00:00'
-        })
+        event = Event.from_dict({**event_data, 'end_time': '2024-12-15T12:00:00'})
         
-        formatted = event.get_formatted_end_time()
-        # Should format to something like "12:00 PM"
-        assert 'PM' in formatted or 'AM' in formatted or ':' in formatted
+        assert event.get_formatted_end_time() == '12:00 PM'
     
-    def test_get_formatted_end_time_invalid(self):
+    def test_get_formatted_end_time_invalid(self, event_data):
         """Test formatted end time with invalid format."""
-        event = Event.from_dict({
-            'event_id': 'evt-1',
-            'event_name': 'Conference',
-            'start_time': 'invalid',
-            'end_time': 'invalid-end'
-        })
+        event = Event.from_dict({**event_data, 'end_time': 'invalid-end'})
         
         # Should return the original string when parsing fails
-        formatted = event.get_formatted_end_time()
-        assert formatted == 'invalid-end'
+        assert event.get_formatted_end_time() == 'invalid-end'
 
 
 class TestNotificationMessage:
     """Test suite for NotificationMessage model."""
     
-    def test_from_json_valid_message(self):
+    def test_from_json_valid_message(self, event_data):
         """Test creating NotificationMessage from valid JSON."""
-        json_str = json.dumps({
-            "type": "event_created",
-            "event": {
-                "event_id": "event-123",
-                "event_name": "Test Event",
-                "description": "Test description",
-                "start_time": "2025-12-01T10:00:00",
-                "end_time": "2025-12-01T12:00:00",
-                "organizer_id": "org-123",
-                "location": "Test Room",
-                "remaining_seats": 10
-            }
-        })
+        json_str = json.dumps({"type": "event_created", "event": event_data})
         
         message = NotificationMessage.from_json(json_str)
         
@@ -227,16 +197,45 @@ class TestNotificationMessage:
         with pytest.raises(ValueError, match="Missing required field: 'event'"):
             NotificationMessage.from_json(json_str)
     
-    def test_from_json_invalid_event_type(self):
-        """Test error handling for invalid event type."""
+    @pytest.mark.parametrize("event_type", ["invalid_type", ["event_created"], {"name": "event_created"}])
+    def test_from_json_invalid_event_type(self, event_type):
+        """Test error handling for invalid event type, including unhashable values."""
         json_str = json.dumps({
-            "type": "invalid_type",
+            "type": event_type,
             "event": {"event_id": "e1"}
         })
         
         with pytest.raises(ValueError, match="Invalid event type"):
             NotificationMessage.from_json(json_str)
     
+    def test_from_json_accepts_bytes(self):
+        """Test that raw message bodies can be parsed without decoding first."""
+        body = json.dumps({
+            "type": "event_created",
+            "event": {"event_id": "e1", "event_name": "Test Event"}
+        }).encode('utf-8')
+        
+        message = NotificationMessage.from_json(body)
+        
+        assert message.type == "event_created"
+        assert message.event.event_name == "Test Event"
+    
+    def test_from_dict_valid_message(self):
+        """Test building a message from an already-decoded dict."""
+        message = NotificationMessage.from_dict({
+            "type": "event_reminder",
+            "event": {"event_id": "e1", "event_name": "Test Event", "reminder_type": "one_hour"}
+        })
+        
+        assert message.type == "event_reminder"
+        assert message.event.event_id == "e1"
+        assert message.event.reminder_type == "one_hour"
+    
+    def test_from_dict_missing_type(self):
+        """Test that from_dict validates like from_json."""
+        with pytest.raises(ValueError, match="Missing required field: 'type'"):
+            NotificationMessage.from_dict({"event": {"event_id": "e1"}})
+    
     def test_str_representation(self):
         """Test string representation of NotificationMessage."""
         event = Event(
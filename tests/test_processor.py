@@ -3,21 +3,70 @@ Unit tests for NotificationProcessor.
 """
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
-from processor.notification_processor import NotificationProcessor
-from models.dto import NotificationMessage, Event
+import processor.notification_processor as processor_module
+from processor.notification_processor import NotificationProcessor, get_notification_processor, process_message_sync
+from models.dto import BookingContact, NotificationMessage, Event
 
 
 class TestNotificationProcessor:
     """Test suite for NotificationProcessor."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def processor(self):
-        """Create a NotificationProcessor instance."""
+        """Create one NotificationProcessor for the class; tests only patch its collaborators."""
         return NotificationProcessor()
     
     @pytest.fixture
+    def booking_client(self, processor, monkeypatch):
+        """Give the processor a mock booking client that streams the contact pages in .pages."""
+        client = Mock()
+        client.pages = []
+        
+        async def prefetch_contacts(**kwargs):
+            for page in client.pages:
+                yield page
+                
+        client.prefetch_contacts = Mock(side_effect=prefetch_contacts)
+        monkeypatch.setattr(processor, '_booking_client', client)
+        return client
+    
+    def test_get_notification_processor_is_shared(self):
+        """Test that the module-level processor is built once and reused."""
+        assert get_notification_processor() is get_notification_processor()
+    
+    def test_process_message_sync_reuses_event_loop(self):
+        """Test that synchronous processing runs every message on one loop."""
+        with patch('processor.notification_processor.get_notification_processor') as mock_get_processor:
+            mock_get_processor.return_value.process = AsyncMock()
+            
+            process_message_sync(Mock())
+            loop = processor_module._sync_loop
+            process_message_sync(Mock())
+            
+        assert processor_module._sync_loop is loop
+        assert mock_get_processor.return_value.process.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_booking_client_shared_until_closed(self, monkeypatch):
+        """Test that one booking client serves every message until the processor is closed."""
+        client = Mock(close=AsyncMock())
+        client_class = Mock(return_value=client)
+        monkeypatch.setattr('processor.notification_processor.AsyncBookingAPIClient', client_class)
+        processor = NotificationProcessor()
+        
+        assert processor.booking_client is processor.booking_client
+        client_class.assert_called_once()
+        
+        with patch.object(processor.email_service, 'close', new_callable=AsyncMock) as mock_email_close:
+            await processor.close()
+            
+        client.close.assert_awaited_once()
+        mock_email_close.assert_awaited_once()
+        assert processor._booking_client is None
+    
+    @pytest.fixture(scope="class")
     def sample_event(self):
-        """Create a sample event."""
+        """Create a sample event; no test here mutates it."""
         return Event(
             event_id="event-123",
             event_name="Test Event",
@@ -30,26 +79,22 @@ class TestNotificationProcessor:
         )
     
     @pytest.mark.asyncio
-    async def test_process_event_created(self, processor, sample_event):
+    async def test_process_event_created(self, processor, sample_event, booking_client):
         """Test processing event_created notification."""
         message = NotificationMessage(
             type="event_created",
             event=sample_event
         )
         
-        with patch('processor.notification_processor.ParticipantRepository') as mock_repo_class:
-            mock_repo = Mock()
-            mock_repo.__enter__ = Mock(return_value=mock_repo)
-            mock_repo.__exit__ = Mock(return_value=None)
-            mock_repo.count_participants_by_event.return_value = 0
-            mock_repo_class.return_value = mock_repo
-            
+        with patch.object(processor.email_service, 'send_batch', new_callable=AsyncMock) as mock_send:
             await processor.process(message)
             
-            mock_repo.count_participants_by_event.assert_called_once()
+        # No separate count request; an empty first page means no participants
+        booking_client.get_bookings_count.assert_not_called()
+        mock_send.assert_not_called()
     
     @pytest.mark.asyncio
-    async def test_process_unknown_type(self, processor, sample_event):
+    async def test_process_unknown_type(self, processor, sample_event, booking_client):
         """Test processing unknown notification type."""
         message = NotificationMessage(
             type="unknown_type",
@@ -57,52 +102,60 @@ class TestNotificationProcessor:
         )
         
         # Should handle gracefully
-        with patch('processor.notification_processor.ParticipantRepository') as mock_repo_class:
-            mock_repo = Mock()
-            mock_repo.__enter__ = Mock(return_value=mock_repo)
-            mock_repo.__exit__ = Mock(return_value=None)
-            mock_repo_class.return_value = mock_repo
-            
-            await processor.process(message)
+        await processor.process(message)
+        
+        # Template lookup fails before any booking data is fetched
+        booking_client.prefetch_contacts.assert_not_called()
     
     @pytest.mark.asyncio
-    async def test_process_with_participants(self, processor, sample_event):
+    async def test_process_with_participants(self, processor, sample_event, booking_client):
         """Test processing with actual participants."""
         message = NotificationMessage(
             type="event_created",
             event=sample_event
         )
         
-        mock_participant = Mock()
-        mock_participant.name = "Test User"
-        mock_participant.email = "test@example.com"
+        booking_client.pages = [[BookingContact("test@example.com", "Test User")]]
         
-        with patch('processor.notification_processor.ParticipantRepository') as mock_repo_class:
-            mock_repo = Mock()
-            mock_repo.__enter__ = Mock(return_value=mock_repo)
-            mock_repo.__exit__ = Mock(return_value=None)
-            mock_repo.count_participants_by_event.return_value = 1
-            mock_repo.get_participants_by_event.side_effect = [[mock_participant], []]
-            mock_repo_class.return_value = mock_repo
+        with patch.object(processor.email_service, 'send_batch', new_callable=AsyncMock, return_value=(1, 0)) as mock_send:
+            await processor.process(message)
             
-            with patch.object(processor.email_service, 'send_batch', new_callable=AsyncMock, return_value=(1, 0)):
+        # Verify participants were streamed and emailed
+        booking_client.prefetch_contacts.assert_called_once_with(
+            event_id="event-123",
+            batch_size=processor.batch_size
+        )
+        mock_send.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_process_raises_when_a_batch_fails(self, processor, sample_event, booking_client):
+        """Test that a failed batch fails the message instead of being dropped."""
+        message = NotificationMessage(
+            type="event_created",
+            event=sample_event
+        )
+        booking_client.pages = [
+            [BookingContact("user1@example.com", "User 1")],
+            [BookingContact("user2@example.com", "User 2")]
+        ]
+        
+        with patch.object(
+            processor.email_service, 'send_batch', new_callable=AsyncMock,
+            side_effect=[(1, 0), RuntimeError("provider down")]
+        ) as mock_send:
+            with pytest.raises(RuntimeError, match="provider down"):
                 await processor.process(message)
-            
-            # Verify participants were fetched
-            assert mock_repo.get_participants_by_event.call_count >= 1
+        
+        # The other batch still finished before the error surfaced
+        assert mock_send.await_count == 2
     
     @pytest.mark.asyncio
     async def test_send_batch_emails(self, processor, sample_event):
         """Test sending batch emails."""
-        mock_participant1 = Mock()
-        mock_participant1.name = "User 1"
-        mock_participant1.email = "user1@example.com"
-        
-        mock_participant2 = Mock()
-        mock_participant2.name = "User 2"
-        mock_participant2.email = "user2@example.com"
-        
-        participants = [mock_participant1, mock_participant2]
+        participants = [
+            BookingContact("user1@example.com", "User 1"),
+            BookingContact("user2@example.com", "User 2")
+        ]
         
         with patch.object(processor.email_service, 'send_batch', new_callable=AsyncMock, return_value=(2, 0)) as mock_send:
             successful, failed = await processor._send_batch_emails(
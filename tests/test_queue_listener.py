@@ -0,0 +1,41 @@
+"""
+Unit tests for the queue listener helpers.
+"""
+from unittest.mock import patch
+from consumer.queue_listener import _TTLCache
+
+
+class TestTTLCache:
+    """Test suite for the event name cache."""
+    
+    def test_entries_expire_after_ttl(self):
+        """Test that values are dropped once their TTL has passed."""
+        cache = _TTLCache(maxsize=10, ttl=30)
+        
+        with patch('consumer.queue_listener.time.monotonic', return_value=100.0):
+            cache.set("event-1", 5)
+        with patch('consumer.queue_listener.time.monotonic', return_value=120.0):
+            assert cache.get("event-1") == 5
+        with patch('consumer.queue_listener.time.monotonic', return_value=131.0):
+            assert cache.get("event-1") is None
+    
+    def test_least_recently_used_entry_evicted(self):
+        """Test that the oldest unused entry is evicted when full."""
+        cache = _TTLCache(maxsize=2, ttl=30)
+        
+        cache.set("event-1", 1)
+        cache.set("event-2", 2)
+        cache.get("event-1")
+        cache.set("event-3", 3)
+        
+        assert cache.get("event-1") == 1
+        assert cache.get("event-2") is None
+        assert cache.get("event-3") == 3
+    
+    def test_zero_ttl_disables_caching(self):
+        """Test that a TTL of zero never stores values."""
+        cache = _TTLCache(maxsize=2, ttl=0)
+        
+        cache.set("event-1", 1)
+        
+        assert cache.get("event-1") is None
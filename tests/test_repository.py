@@ -2,11 +2,28 @@
 Unit tests for ParticipantRepository.
 """
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from data.database import Base, Participant
 from data.repository import ParticipantRepository
 from models.dto import BookingBatchResponse
 
 
+def _bookings(count):
+    """Build booking dictionaries as returned by the booking service."""
+    return [
+        {
+            "booking_id": f"booking-{i}",
+            "event_id": "event-123",
+            "user_id": f"user-{i}",
+            "user_email": f"user{i}@example.com"
+        }
+        for i in range(count)
+    ]
+
+
 class TestParticipantRepository:
     """Test suite for ParticipantRepository."""
     
@@ -20,6 +37,13 @@ class TestParticipantRepository:
         """Create a repository with mocked client."""
         return ParticipantRepository(booking_client=mock_booking_client)
     
+    @pytest.fixture
+    def mock_session(self, monkeypatch):
+        """Make repositories open a mock session instead of a database connection."""
+        session = MagicMock()
+        monkeypatch.setattr('data.repository.get_session', lambda: session)
+        return session
+    
     def test_repository_initialization(self):
         """Test that repository initializes with a BookingAPIClient."""
         repo = ParticipantRepository()
@@ -120,6 +144,44 @@ class TestParticipantRepository:
         # Assert
         assert count == 0
     
+    def test_get_event_name(self, repository, mock_booking_client):
+        """Test event name lookup reads a single booking."""
+        mock_booking_client.get_bookings_batch.return_value = [
+            BookingBatchResponse(
+                booking_id="booking-1",
+                event_id="event-123",
+                user_id="user-1",
+                user_email="user1@example.com",
+                event_name="Test Event"
+            )
+        ]
+        
+        # Execute
+        event_name = repository.get_event_name("event-123")
+        
+        # Assert
+        assert event_name == "Test Event"
+        mock_booking_client.get_bookings_batch.assert_called_once_with(
+            event_id="event-123",
+            offset=0,
+            batch_size=1
+        )
+    
+    def test_get_event_name_defaults(self, repository, mock_booking_client):
+        """Test event name fallbacks for unnamed and empty events."""
+        mock_booking_client.get_bookings_batch.return_value = [
+            BookingBatchResponse(
+                booking_id="booking-1",
+                event_id="event-123",
+                user_id="user-1",
+                user_email="user1@example.com"
+            )
+        ]
+        assert repository.get_event_name("event-123") == "Event"
+        
+        mock_booking_client.get_bookings_batch.return_value = []
+        assert repository.get_event_name("event-empty") is None
+    
     def test_get_participants_api_error_propagates(self, repository, mock_booking_client):
         """Test that API errors are propagated."""
         mock_booking_client.get_bookings_batch.side_effect = Exception("API Error")
@@ -147,112 +209,110 @@ class TestParticipantRepository:
         # Should not raise any errors
         repository.close()
     
-    def test_add_participant(self):
-        """Test adding a participant to the database."""
-        with patch('data.repository.get_session') as mock_get_session:
-            mock_session = Mock()
-            mock_get_session.return_value = mock_session
-            
-            repo = ParticipantRepository()
+    def test_session_opened_lazily(self, mock_booking_client):
+        """Test that API-backed reads never open a database session."""
+        mock_booking_client.get_bookings_count.return_value = 3
+        
+        with patch('data.repository.get_session') as mock_get_session, \
+             patch('data.repository.close_session') as mock_close_session:
+            repo = ParticipantRepository(booking_client=mock_booking_client)
+            assert repo.count_participants_by_event("event-123") == 3
+            repo.close()
             
-            participant = repo.add_participant(
+            mock_get_session.assert_not_called()
+            mock_close_session.assert_not_called()
+    
+    def test_add_participant(self, mock_session):
+        """Test adding a participant to the database."""
+        repo = ParticipantRepository()
+        
+        participant = repo.add_participant(
+            booking_id="booking-123",
+            event_id="event-456",
+            user_id="user-789",
+            user_email="user@example.com",
+            event_name="Test Event",
+            booking_time="2024-12-01T10:00:00",
+            status="confirmed"
+        )
+        
+        assert participant is not None
+        mock_session.add.assert_called_once()
+        mock_session.commit.assert_called_once()
+    
+    def test_add_participant_rollback_on_error(self, mock_session):
+        """Test that session rolls back on error during add_participant."""
+        mock_session.commit.side_effect = Exception("Database error")
+        repo = ParticipantRepository()
+        
+        with pytest.raises(Exception, match="Database error"):
+            repo.add_participant(
                 booking_id="booking-123",
                 event_id="event-456",
                 user_id="user-789",
-                user_email="user@example.com",
-                event_name="Test Event",
-                booking_time="2024-12-01T10:00:00",
-                status="confirmed"
+                user_email="user@example.com"
             )
-            
-            assert participant is not None
-            mock_session.add.assert_called_once()
-            mock_session.commit.assert_called_once()
+        
+        mock_session.rollback.assert_called_once()
     
-    def test_add_participant_rollback_on_error(self):
-        """Test that session rolls back on error during add_participant."""
-        with patch('data.repository.get_session') as mock_get_session:
-            mock_session = Mock()
-            mock_session.commit.side_effect = Exception("Database error")
-            mock_get_session.return_value = mock_session
-            
-            repo = ParticipantRepository()
-            
-            with pytest.raises(Exception, match="Database error"):
-                repo.add_participant(
-                    booking_id="booking-123",
-                    event_id="event-456",
-                    user_id="user-789",
-                    user_email="user@example.com"
-                )
-            
-            mock_session.rollback.assert_called_once()
+    @pytest.mark.parametrize("commit_side_effect, count, expected, row_inserts", [
+        # One bulk insert and commit, no per-row inserts
+        (None, 2, 2, 0),
+        # Bulk commit conflicts; then first row succeeds, second fails, third succeeds
+        ([IntegrityError("INSERT", {}, Exception("duplicate booking_id")), None, Exception("Error"), None], 3, 2, 3)
+    ], ids=["bulk", "conflict_fallback"])
+    def test_add_participants_from_bookings(self, mock_session, commit_side_effect, count, expected, row_inserts):
+        """Test bulk adding participants, falling back to per-row inserts on conflict."""
+        mock_session.commit.side_effect = commit_side_effect
+        bookings = _bookings(count)
+        
+        assert ParticipantRepository().add_participants_from_bookings(bookings) == expected
+        
+        mock_session.bulk_insert_mappings.assert_called_once()
+        rows = mock_session.bulk_insert_mappings.call_args[0][1]
+        assert [row["booking_id"] for row in rows] == [b["booking_id"] for b in bookings]
+        assert mock_session.add.call_count == row_inserts
     
-    def test_add_participants_from_bookings(self):
-        """Test bulk adding participants from booking data."""
-        with patch('data.repository.get_session') as mock_get_session:
-            mock_session = Mock()
-            mock_get_session.return_value = mock_session
-            
-            repo = ParticipantRepository()
-            
-            bookings = [
-                {
-                    "booking_id": "booking-1",
-                    "event_id": "event-123",
-                    "user_id": "user-1",
-                    "user_email": "user1@example.com",
-                    "event_name": "Event 1",
-                    "status": "confirmed"
-                },
-                {
-                    "booking_id": "booking-2",
-                    "event_id": "event-123",
-                    "user_id": "user-2",
-                    "user_email": "user2@example.com",
-                    "event_name": "Event 1",
-                    "status": "confirmed"
-                }
-            ]
-            
-            count = repo.add_participants_from_bookings(bookings)
-            
-            assert count == 2
-            assert mock_session.add.call_count == 2
-            assert mock_session.commit.call_count == 2
+    def test_add_participants_from_bookings_chunks_large_imports(self, mock_session, monkeypatch):
+        """Test that large imports are inserted in chunks under a single commit."""
+        monkeypatch.setattr('data.repository.BULK_INSERT_CHUNK_SIZE', 2)
+        repo = ParticipantRepository()
+        
+        count = repo.add_participants_from_bookings(_bookings(5))
+        
+        assert count == 5
+        chunk_sizes = [len(c[0][1]) for c in mock_session.bulk_insert_mappings.call_args_list]
+        assert chunk_sizes == [2, 2, 1]
+        mock_session.commit.assert_called_once()
     
-    def test_add_participants_from_bookings_partial_failure(self):
-        """Test that bulk add continues on individual failures."""
-        with patch('data.repository.get_session') as mock_get_session:
-            mock_session = Mock()
-            # First commit succeeds, second fails, third succeeds
-            mock_session.commit.side_effect = [None, Exception("Error"), None]
-            mock_get_session.return_value = mock_session
-            
-            repo = ParticipantRepository()
-            
-            bookings = [
-                {
-                    "booking_id": "booking-1",
-                    "event_id": "event-123",
-                    "user_id": "user-1",
-                    "user_email": "user1@example.com"
-                },
-                {
-                    "booking_id": "booking-2",
-                    "event_id": "event-123",
-                    "user_id": "user-2",
-                    "user_email": "user2@example.com"
-                },
-                {
-                    "booking_id": "booking-3",
-                    "event_id": "event-123",
-                    "user_id": "user-3",
-                    "user_email": "user3@example.com"
-                }
-            ]
-            
-            count = repo.add_participants_from_bookings(bookings)
-            
-            # Should have added 2 successfully (first and third)
-            assert count == 2
+    def test_add_participants_from_bookings_uses_copy_on_postgres(self, mock_session, monkeypatch):
+        """Test that large PostgreSQL imports are streamed with COPY."""
+        monkeypatch.setattr('data.repository.COPY_THRESHOLD', 1)
+        mock_session.get_bind.return_value.dialect.name = 'postgresql'
+        cursor = mock_session.connection.return_value.connection.cursor.return_value.__enter__.return_value
+        repo = ParticipantRepository()
+        
+        count = repo.add_participants_from_bookings(_bookings(3))
+        
+        assert count == 3
+        sql, buf = cursor.copy_expert.call_args[0]
+        assert sql.startswith("COPY participants (booking_id,")
+        lines = buf.getvalue().splitlines()
+        assert lines[0] == "booking-0,event-123,user-0,user0@example.com,,,confirmed"
+        assert len(lines) == 3
+        mock_session.bulk_insert_mappings.assert_not_called()
+        mock_session.commit.assert_called_once()
+    
+    def test_add_participants_from_bookings_skips_existing(self):
+        """Test that existing bookings are skipped by one ON CONFLICT insert."""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        session = Session(engine)
+        repo = ParticipantRepository(booking_client=Mock(), session=session)
+        
+        bookings = _bookings(3)
+        
+        assert repo.add_participants_from_bookings(bookings[:2]) == 2
+        assert repo.add_participants_from_bookings(bookings) == 1
+        assert session.query(Participant).count() == 3
+        session.close()
@@ -1,19 +1,42 @@
 """
 Unit tests for API routes.
 """
+import asyncio
 import pytest
+from types import SimpleNamespace
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, patch
 from api.main import app
+from api.routes import EventData, process_notification_async
 
 
-client = TestClient(app)
+EVENT_FIELDS = {
+    "event_id": "event-123",
+    "event_name": "Test Event",
+    "start_time": "2024-12-15T10:00:00",
+    "end_time": "2024-12-15T12:00:00",
+    "organizer_id": "organizer-1",
+    "location": "Test Hall",
+    "remaining_seats": 50
+}
+
+
+@pytest.fixture(scope="module")
+def client():
+    """
+    Create a test client with startup/shutdown events (worker pool) running.
+    Queued notifications are not processed, so route tests never reach the
+    booking service or an email provider.
+    """
+    with patch('api.routes.process_notification_async', new_callable=AsyncMock), \
+         TestClient(app) as test_client:
+        yield test_client
 
 
 class TestAPIRoutes:
     """Test suite for API routes."""
     
-    def test_health_check(self):
+    def test_health_check(self, client):
         """Test health check endpoint."""
         response = client.get("/api/health")
         
@@ -21,35 +44,59 @@ class TestAPIRoutes:
         data = response.json()
         assert data["status"] == "healthy"
         assert data["service"] == "notification-service"
+        assert data["version"] == "1.0.0"
+        assert response.headers["content-type"] == "application/json"
+
+    def test_send_notification_invalid_type(self, client):
+        """Test notification with invalid type."""
+        payload = {"type": "invalid_type", "event": EVENT_FIELDS}
+        
+        response = client.post("/api/notifications/send", json=payload)
+        
+        assert response.status_code == 400
+        assert "invalid type" in response.json()["detail"].lower()
     
-    def test_send_notification_success(self):
-        """Test successful notification sending."""
+    def test_send_notification_missing_fields(self, client):
+        """Test notification with missing required fields."""
         payload = {
             "type": "event_created",
             "event": {
                 "event_id": "event-123",
-                "event_name": "Test Event",
-                "description": "Test Description",
-                "start_time": "2024-12-15T10:00:00",
-                "end_time": "2024-12-15T12:00:00",
-                "organizer_id": "organizer-1",
-                "location": "Test Hall",
-                "remaining_seats": 50
+                "event_name": "Test Event"
+                # Missing required fields
             }
         }
         
         response = client.post("/api/notifications/send", json=payload)
         
-        assert response.status_code == 200
+        assert response.status_code == 422  # Validation error
+    
+    @pytest.mark.parametrize("notif_type, extra_fields", [
+        ("event_created", {"description": "Test Description"}),
+        ("event_updated", {}),
+        ("event_update", {}),
+        ("event_cancelled", {}),
+        ("event_reminder", {}),
+        ("event_reminder", {"reminder_type": "one_day"})
+    ], ids=[
+        "created", "updated", "update_alias", "cancelled", "reminder", "reminder_one_day"
+    ])
+    def test_send_notification_success(self, client, notif_type, extra_fields):
+        """Test that every valid notification type is queued."""
+        payload = {"type": notif_type, "event": {**EVENT_FIELDS, **extra_fields}}
+        
+        response = client.post("/api/notifications/send", json=payload)
+        
+        assert response.status_code == 200, f"Failed for type: {notif_type}"
         data = response.json()
         assert data["success"] is True
         assert data["event_id"] == "event-123"
         assert "queued" in data["message"].lower()
-    
-    def test_send_notification_invalid_type(self):
-        """Test notification with invalid type."""
+
+    def test_send_notification_queue_full(self, client):
+        """Test that a saturated worker queue returns 503."""
         payload = {
-            "type": "invalid_type",
+            "type": "event_created",
             "event": {
                 "event_id": "event-123",
                 "event_name": "Test Event",
@@ -60,67 +107,126 @@ class TestAPIRoutes:
                 "remaining_seats": 50
             }
         }
+        full_queue = asyncio.Queue(maxsize=1)
+        full_queue.put_nowait(("event_created", EventData(**EVENT_FIELDS)))
         
-        response = client.post("/api/notifications/send", json=payload)
-        
-        assert response.status_code == 400
-        assert "invalid type" in response.json()["detail"].lower()
-    
-    def test_send_notification_missing_fields(self):
-        """Test notification with missing required fields."""
-        payload = {
-            "type": "event_created",
-            "event": {
-                "event_id": "event-123",
-                "event_name": "Test Event"
-                # Missing required fields
-            }
-        }
-        
-        response = client.post("/api/notifications/send", json=payload)
-        
-        assert response.status_code == 422  # Validation error
-    
-    def test_send_notification_all_types(self):
-        """Test all valid notification types."""
-        valid_types = ["event_created", "event_updated", "event_update", "event_cancelled", "event_reminder"]
-        
-        for notif_type in valid_types:
-            payload = {
-                "type": notif_type,
-                "event": {
-                    "event_id": "event-123",
-                    "event_name": "Test Event",
-                    "start_time": "2024-12-15T10:00:00",
-                    "end_time": "2024-12-15T12:00:00",
-                    "organizer_id": "organizer-1",
-                    "location": "Test Hall",
-                    "remaining_seats": 50
-                }
-            }
-            
+        original_queue = app.state.notification_queue
+        app.state.notification_queue = full_queue
+        try:
             response = client.post("/api/notifications/send", json=payload)
+        finally:
+            app.state.notification_queue = original_queue
             
-            assert response.status_code == 200, f"Failed for type: {notif_type}"
-            assert response.json()["success"] is True
-    
-    def test_send_notification_with_reminder_type(self):
-        """Test sending reminder notification."""
+        assert response.status_code == 503
+
+    def test_send_notification_duplicate_in_flight(self, client):
+        """Test that a duplicate of an in-flight notification is not queued again."""
         payload = {
-            "type": "event_reminder",
+            "type": "event_updated",
             "event": {
-                "event_id": "event-123",
+                "event_id": "event-dup",
                 "event_name": "Test Event",
                 "start_time": "2024-12-15T10:00:00",
                 "end_time": "2024-12-15T12:00:00",
                 "organizer_id": "organizer-1",
                 "location": "Test Hall",
-                "remaining_seats": 50,
-                "reminder_type": "one_day"
+                "remaining_seats": 50
             }
         }
+        app.state.inflight_notifications.add("event-dup:event_updated")
+        try:
+            response = client.post("/api/notifications/send", json=payload)
+        finally:
+            app.state.inflight_notifications.discard("event-dup:event_updated")
+            
+        assert response.status_code == 200
+        assert "already queued" in response.json()["message"].lower()
+
+    def test_responses_are_serialized_with_orjson(self, client):
+        """Test that the app uses ORJSONResponse as its default response class."""
+        from fastapi.responses import ORJSONResponse
         
-        response = client.post("/api/notifications/send", json=payload)
+        assert app.router.default_response_class is ORJSONResponse
+        response = client.get("/api/health")
+        assert response.headers["content-type"] == "application/json"
+
+
+class TestNotificationWorker:
+    """Test suite for the notification worker pool."""
+    
+    @pytest.mark.asyncio
+    async def test_worker_processes_queued_notifications(self):
+        """Test that a worker drains queued notifications in order."""
+        from api.routes import notification_worker
         
-        assert response.status_code == 200
-        assert response.json()["success"] is True
+        first_event = EventData(**{**EVENT_FIELDS, "event_id": "event-1"})
+        second_event = EventData(**{**EVENT_FIELDS, "event_id": "event-2"})
+        
+        queue = asyncio.Queue()
+        queue.put_nowait(("event_created", first_event))
+        queue.put_nowait(("event_updated", second_event))
+        
+        inflight = {"event-1:event_created", "event-2:event_updated"}
+        
+        with patch('api.routes.process_notification_async', new_callable=AsyncMock) as mock_process:
+            worker = asyncio.create_task(notification_worker(queue, inflight))
+            await queue.join()
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+        
+        assert mock_process.await_count == 2
+        assert inflight == set()
+        mock_process.assert_any_await("event_created", first_event)
+        mock_process.assert_any_await("event_updated", second_event)
+
+    @pytest.mark.asyncio
+    async def test_stop_workers_drains_accepted_notifications(self):
+        """Test that shutdown finishes queued notifications before cancelling workers."""
+        from api.routes import start_notification_workers, stop_notification_workers
+        
+        app = SimpleNamespace(state=SimpleNamespace())
+        
+        with patch('api.routes.process_notification_async', new_callable=AsyncMock) as mock_process:
+            start_notification_workers(app)
+            for i in range(3):
+                app.state.notification_queue.put_nowait(
+                    ("event_created", EventData(**{**EVENT_FIELDS, "event_id": f"event-{i}"}))
+                )
+            await stop_notification_workers(app)
+            
+        assert mock_process.await_count == 3
+        assert app.state.notification_workers == []
+    
+    @pytest.mark.asyncio
+    async def test_stop_workers_gives_up_after_timeout(self, caplog):
+        """Test that a stuck notification is logged and dropped once the drain times out."""
+        from api.routes import start_notification_workers, stop_notification_workers
+        
+        app = SimpleNamespace(state=SimpleNamespace())
+        
+        async def _stuck(notification_type, event_data):
+            await asyncio.Event().wait()
+            
+        with patch('api.routes.process_notification_async', side_effect=_stuck):
+            start_notification_workers(app)
+            app.state.notification_queue.put_nowait(("event_created", EventData(**EVENT_FIELDS)))
+            app.state.inflight_notifications.add("event-123:event_created")
+            await stop_notification_workers(app, timeout=0.01)
+            
+        assert app.state.notification_workers == []
+        assert "dropping 1 notifications" in caplog.text
+    
+    @pytest.mark.asyncio
+    async def test_process_notification_builds_event_from_model(self):
+        """Test that the validated request model maps onto the Event DTO."""
+        event_data = EventData(**EVENT_FIELDS, reminder_type="one_day")
+        
+        with patch('api.routes.get_notification_processor') as mock_get_processor:
+            mock_get_processor.return_value.process = AsyncMock()
+            await process_notification_async("event_reminder", event_data)
+            
+        message = mock_get_processor.return_value.process.call_args[0][0]
+        assert message.type == "event_reminder"
+        assert message.event.event_id == "event-123"
+        assert message.event.location == "Test Hall"
+        assert message.event.reminder_type == "one_day"
@@ -117,12 +117,67 @@ class TestEmailTemplates:
         assert 'Charlie Davis' in rendered['body']
         # Should still be valid HTML
         assert '<html>' in rendered['body']
-    
+
+    def test_personalize_matches_render_template(self, sample_event):
+        """Test that a prepared template personalizes to the full render."""
+        prepared = EmailTemplateLoader.prepare_template('event_created', sample_event)
+
+        for name in ["Alice Brown", "Charlie Davis"]:
+            assert EmailTemplateLoader.personalize(prepared, name) == (
+                EmailTemplateLoader.render_template('event_created', sample_event, name)
+            )
+
+    def test_personalize_batch(self, sample_event):
+        """Test that batch personalization renders one body per name, in order."""
+        prepared = EmailTemplateLoader.prepare_template('event_created', sample_event)
+
+        bodies = EmailTemplateLoader.personalize_batch(prepared, ["Alice Brown", "Charlie Davis"])
+
+        assert bodies == [
+            EmailTemplateLoader.personalize(prepared, "Alice Brown")['body'],
+            EmailTemplateLoader.personalize(prepared, "Charlie Davis")['body']
+        ]
+
+    def test_prepare_template_reuses_render_for_unchanged_event(self, sample_event):
+        """Test that an unchanged event reuses its render and an edited one does not."""
+        first = EmailTemplateLoader.prepare_template('event_created', sample_event)
+        again = EmailTemplateLoader.prepare_template('event_created', sample_event)
+        assert again['body'] is first['body']
+
+        sample_event.location = "Main Hall"
+        edited = EmailTemplateLoader.prepare_template('event_created', sample_event)
+        assert "Main Hall" in edited['body']
+        assert edited['body'] is not first['body']
+
+    def test_prepare_template_with_unhashable_fields(self, sample_event):
+        """Test that unhashable field values from queue JSON render uncached instead of raising TypeError."""
+        sample_event.description = ["first", "second"]
+        sample_event.remaining_seats = {"total": 50}
+
+        prepared = EmailTemplateLoader.prepare_template('event_created', sample_event)
+
+        assert "['first', 'second']" in prepared['body']
+        assert "{'total': 50}" in prepared['body']
+
+        with pytest.raises(ValueError, match="No template found"):
+            EmailTemplateLoader.prepare_template(['event_created'], sample_event)
+
+    def test_compiled_templates_match_format(self):
+        """Test that rendering a compiled template matches str.format on the source."""
+        from templates.email_templates import _compile, _render
+        values = {
+            'name': 'Alice', 'event_id': 'e-1', 'event_name': 'Meetup', 'location': 'Hall',
+            'start_time': 'Mon', 'end_time': 'Tue', 'remaining_seats': 3,
+            'description_section': '<p>Desc</p>', 'reminder_message': 'Soon'
+        }
+        for template in EmailTemplateLoader.TEMPLATES.values():
+            for text in template.values():
+                assert _render(_compile(text), values) == text.format(**values)
+
     def test_all_templates_have_required_fields(self):
-        """Test that all templates have subject and body."""
-        for event_type in ['event_created', 'event_updated', 'event_reminder', 'event_cancelled']:
-            template = EmailTemplateLoader.get_template(event_type)
-            assert 'subject' in template
-            assert 'body' in template
-            assert len(template['subject']) > 0
-            assert len(template['body']) > 0
+        """Test that all templates have a non-empty subject and body."""
+        bad = [
+            event_type for event_type, template in EmailTemplateLoader.TEMPLATES.items()
+            if not (template.get('subject') and template.get('body'))
+        ]
+        assert not bad, bad